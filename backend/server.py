@@ -1,23 +1,49 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Path, BackgroundTasks, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Path, BackgroundTasks, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import StreamingResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers, MutableHeaders
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne, UpdateOne, ReturnDocument
+from pymongo.errors import OperationFailure, BulkWriteError
 from dotenv import load_dotenv
 from pathlib import Path as FilePath
 import os
+import re
+import csv
 import logging
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Callable, Awaitable, Hashable, AsyncIterator
 import uuid
-from datetime import datetime, timedelta
+import math
+import random
+import heapq
+import base64
+import hashlib
+import zlib
+import numpy as np
+from datetime import datetime, timedelta, timezone
 import jwt
 from passlib.context import CryptContext
 import asyncio
+import time
 import httpx
 import json
 from enum import Enum
+from collections import deque, OrderedDict
+from bisect import bisect_left
+from contextlib import asynccontextmanager, contextmanager, AsyncExitStack
+from concurrent.futures import ThreadPoolExecutor
 import smtplib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
@@ -33,8 +59,201 @@ db = client[os.environ.get('DB_NAME', 'park_on_db')]
 # Create the main app without a prefix
 app = FastAPI(title="Park On - Parking API", description="Find and book parking spaces", version="1.0.0")
 
+# JSON responses
+def _json_default(value: Any) -> Any:
+    """Encode what the JSON library can't natively; orjson already handles datetimes and enums"""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dump_json(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_json_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+class APIJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when it is installed, and the standard library otherwise
+    
+    Endpoints with large payloads can return one wrapping their APIResponse directly, which
+    skips FastAPI's dump, re-validate and encode round trip through response_model.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+# Sparse fieldsets
+def parse_fields(fields: Optional[str], model: type) -> Optional[Dict[str, Any]]:
+    """Turn a comma-separated fields= parameter into a model_dump include, or None for every field
+    
+    Dotted names select inside a nested model, e.g. pricing.hourly_rate.
+    """
+    if not fields:
+        return None
+    
+    include: Dict[str, Any] = {}
+    for name in filter(None, (part.strip() for part in fields.split(","))):
+        head, _, rest = name.partition(".")
+        field = model.model_fields.get(head)
+        if field is None:
+            raise ValueError(f"Unknown field: {name}")
+        if not rest:
+            include[head] = True
+            continue
+        nested = field.annotation
+        if not (isinstance(nested, type) and issubclass(nested, BaseModel) and rest in nested.model_fields):
+            raise ValueError(f"Unknown field: {name}")
+        if include.get(head) is not True:
+            include.setdefault(head, {})[rest] = True
+    return include or None
+
+def mongo_projection(include: Dict[str, Any]) -> Dict[str, int]:
+    """The MongoDB projection returning just the fields of a parse_fields include"""
+    projection = {"_id": 0}
+    for head, nested in include.items():
+        if nested is True:
+            projection[head] = 1
+        else:
+            projection.update({f"{head}.{name}": 1 for name in nested})
+    return projection
+
+# Conditional GET
+def make_etag(*parts: Any) -> str:
+    """Weak ETag over everything a response body is derived from
+    
+    Bodies carry per-response fields such as timestamp and created_at, so two responses
+    with the same tag are equivalent but not byte-identical, which is what W/ promises.
+    """
+    return 'W/"' + hashlib.sha256(dump_json(parts)).hexdigest()[:32] + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check, using the weak comparison RFC 9110 specifies for it"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag.removeprefix("W/") for tag in header.split(","))
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
+
+# NDJSON streams
+# nginx buffers proxied responses by default, which would hold streamed lines back until the buffer fills
+STREAM_HEADERS = {"X-Accel-Buffering": "no"}
+
+# Response compression
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, preferring br on equal quality"""
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name.strip().lower()] = quality
+    
+    supported = (["br"] if brotli is not None else []) + ["gzip"]
+    ranked = [(qualities.get(encoding, qualities.get("*", 0.0)), -rank, encoding) for rank, encoding in enumerate(supported)]
+    quality, _, encoding = max(ranked)
+    return encoding if quality > 0 else None
+
+class StreamCompressor:
+    """Incremental gzip or brotli encoder; every chunk is flushed so streamed lines go out promptly"""
+    
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self.compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self.compressor.process(data)
+            return out + (self.compressor.finish() if final else self.compressor.flush())
+        out = self.compressor.compress(data)
+        return out + self.compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class CompressionMiddleware:
+    """Compress JSON and text responses for clients that accept br or gzip
+    
+    Whole bodies under COMPRESSION_MIN_SIZE are sent as they are. Streamed bodies are
+    compressed chunk by chunk, so NDJSON search results still arrive as they are produced.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start: Optional[Dict[str, Any]] = None
+        compressor: Optional[StreamCompressor] = None
+        
+        async def send_compressed(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether compressing is worth it
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is None:
+                if compressor is not None:
+                    message = {"type": "http.response.body", "body": compressor.compress(body, not more_body), "more_body": more_body}
+                await send(message)
+                return
+            
+            headers = MutableHeaders(raw=list(start["headers"]))
+            content_type = headers.get("content-type", "")
+            compressible = (
+                "content-encoding" not in headers
+                and content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)
+                and (more_body or len(body) >= COMPRESSION_MIN_SIZE)
+            )
+            if compressible or start["status"] == 304:
+                # The encoded body differs byte for byte, so the validator can only be weak
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                headers.add_vary_header("Accept-Encoding")
+            if compressible:
+                compressor = StreamCompressor(encoding)
+                body = compressor.compress(body, not more_body)
+                headers["Content-Encoding"] = encoding
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(body))
+            
+            await send({**start, "headers": headers.raw})
+            start = None
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+        
+        await self.app(scope, receive, send_compressed)
+
 # Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+api_router = APIRouter(prefix="/api", default_response_class=APIJSONResponse)
 
 # Security setup
 security = HTTPBearer()
@@ -50,6 +269,88 @@ SMTP_SERVER = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
 SMTP_PORT = int(os.environ.get('SMTP_PORT', '587'))
 SMTP_USERNAME = os.environ.get('SMTP_USERNAME', '')
 SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD', '')
+SMTP_STARTTLS = os.environ.get('SMTP_STARTTLS', 'true').lower() == 'true'
+SMTP_AUTH = os.environ.get('SMTP_AUTH', 'true').lower() == 'true'  # false for local relays such as aiosmtpd
+SMTP_TIMEOUT_SECONDS = float(os.environ.get('SMTP_TIMEOUT_SECONDS', '30'))
+MAIL_FROM = os.environ.get('MAIL_FROM', SMTP_USERNAME or 'noreply@parkon.app')
+MAIL_DELIVERY_CONFIGURED = not SMTP_AUTH or bool(SMTP_USERNAME and SMTP_PASSWORD)
+
+# Outbound mail queue configuration
+MAIL_BATCH_SIZE = int(os.environ.get('MAIL_BATCH_SIZE', '20'))
+MAIL_POLL_SECONDS = float(os.environ.get('MAIL_POLL_SECONDS', '5'))
+MAIL_MAX_ATTEMPTS = int(os.environ.get('MAIL_MAX_ATTEMPTS', '8'))
+MAIL_RETRY_BASE_SECONDS = float(os.environ.get('MAIL_RETRY_BASE_SECONDS', '30'))
+MAIL_RETRY_MAX_SECONDS = float(os.environ.get('MAIL_RETRY_MAX_SECONDS', '3600'))
+MAIL_LEASE_SECONDS = int(os.environ.get('MAIL_LEASE_SECONDS', '300'))  # a claimed message is retried if not settled by then
+MAIL_SENT_TTL_SECONDS = int(os.environ.get('MAIL_SENT_TTL_SECONDS', str(7 * 24 * 3600)))
+SMTP_IDLE_SECONDS = float(os.environ.get('SMTP_IDLE_SECONDS', '60'))
+
+# Outbound HTTP configuration
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', '5'))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', '15'))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.environ.get('HTTP_MAX_CONNECTIONS_PER_HOST', '20'))
+HTTP_KEEPALIVE_CONNECTIONS_PER_HOST = int(os.environ.get('HTTP_KEEPALIVE_CONNECTIONS_PER_HOST', '10'))
+HTTP_KEEPALIVE_SECONDS = float(os.environ.get('HTTP_KEEPALIVE_SECONDS', '60'))
+NOMINATIM_BASE_URL = "https://nominatim.openstreetmap.org"
+
+# Circuit breaker configuration for upstream endpoints
+CIRCUIT_FAILURE_RATE = float(os.environ.get('CIRCUIT_FAILURE_RATE', '0.5'))
+CIRCUIT_MINIMUM_CALLS = int(os.environ.get('CIRCUIT_MINIMUM_CALLS', '3'))
+CIRCUIT_WINDOW_SIZE = int(os.environ.get('CIRCUIT_WINDOW_SIZE', '10'))
+CIRCUIT_OPEN_SECONDS = float(os.environ.get('CIRCUIT_OPEN_SECONDS', '60'))
+
+# Geocoding cache configuration
+GEOCODE_CACHE_SIZE = int(os.environ.get('GEOCODE_CACHE_SIZE', '10000'))
+GEOCODE_CACHE_TTL_SECONDS = int(os.environ.get('GEOCODE_CACHE_TTL_SECONDS', str(30 * 24 * 3600)))
+GEOCODE_NEGATIVE_TTL_SECONDS = int(os.environ.get('GEOCODE_NEGATIVE_TTL_SECONDS', '300'))
+
+# Batch geocoding limits (Nominatim's usage policy allows one request per second)
+NOMINATIM_REQUESTS_PER_SECOND = float(os.environ.get('NOMINATIM_REQUESTS_PER_SECOND', '1'))
+GEOCODE_BATCH_CONCURRENCY = int(os.environ.get('GEOCODE_BATCH_CONCURRENCY', '4'))
+GEOCODE_BATCH_MAX_QUERIES = 1000
+
+# Offline postcode gazetteer (postcode,latitude,longitude CSV, e.g. the ONS Postcode Directory)
+POSTCODE_CSV_PATH = os.environ.get('POSTCODE_CSV_PATH', str(ROOT_DIR / 'data' / 'postcodes.csv'))
+
+# Parking inventory configuration
+TFL_REFRESH_SECONDS = int(os.environ.get('TFL_REFRESH_SECONDS', '300'))
+INGEST_BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', '500'))
+
+# Search result cache configuration
+SEARCH_CACHE_SIZE = int(os.environ.get('SEARCH_CACHE_SIZE', '2048'))
+SEARCH_CACHE_MAX_CANDIDATES = int(os.environ.get('SEARCH_CACHE_MAX_CANDIDATES', '200000'))  # Summed over all entries
+SEARCH_CACHE_TTL_SECONDS = float(os.environ.get('SEARCH_CACHE_TTL_SECONDS', '60'))
+SEARCH_CACHE_GEOHASH_PRECISION = int(os.environ.get('SEARCH_CACHE_GEOHASH_PRECISION', '7'))  # ~150m cells
+SEARCH_CACHE_RADIUS_STEP_KM = 0.5
+
+# Search result cache write-behind configuration
+PARKING_CACHE_BATCH_SIZE = int(os.environ.get('PARKING_CACHE_BATCH_SIZE', '100'))
+PARKING_CACHE_FLUSH_SECONDS = float(os.environ.get('PARKING_CACHE_FLUSH_SECONDS', '2'))
+PARKING_CACHE_MAX_PENDING = int(os.environ.get('PARKING_CACHE_MAX_PENDING', '2000'))
+PARKING_CACHE_TTL_SECONDS = int(os.environ.get('PARKING_CACHE_TTL_SECONDS', str(24 * 3600)))
+
+# HTTP caching configuration
+SEARCH_MAX_AGE_SECONDS = int(os.environ.get('SEARCH_MAX_AGE_SECONDS', '30'))
+CATALOG_MAX_AGE_SECONDS = int(os.environ.get('CATALOG_MAX_AGE_SECONDS', '3600'))
+
+# Password hashing configuration
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', '64'))
+
+# Booking availability configuration
+BOOKING_SLOT_MINUTES = int(os.environ.get('BOOKING_SLOT_MINUTES', '15'))
+BOOKING_MAX_HOURS = int(os.environ.get('BOOKING_MAX_HOURS', str(7 * 24)))
+BOOKING_SLOT_RETENTION_SECONDS = int(os.environ.get('BOOKING_SLOT_RETENTION_SECONDS', str(30 * 24 * 3600)))
+
+# Authenticated user cache configuration
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '10000'))
+USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', '30'))
+
+# Response compression configuration
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '5'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '3'))
+COMPRESSIBLE_CONTENT_TYPES = ("application/json", "application/x-ndjson", "application/javascript", "text/")
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -77,6 +378,11 @@ class BookingStatus(str, Enum):
     CANCELLED = "cancelled"
     COMPLETED = "completed"
 
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
 # Models
 class Location(BaseModel):
     latitude: float = Field(..., ge=-90, le=90)
@@ -167,25 +473,27 @@ class SubscriptionPlan(BaseModel):
     duration_days: int
     features: List[str]
 
+class BatchGeocodeRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=GEOCODE_BATCH_MAX_QUERIES)
+
 class APIResponse(BaseModel):
     success: bool
     data: Optional[Any] = None
     message: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
+class PaginatedAPIResponse(APIResponse):
+    total: int
+    next_cursor: Optional[str] = None
+
 # Email verification function
 async def send_verification_email(email: str, verification_token: str):
-    """Send email verification"""
+    """Queue the email verification message; the mail worker delivers it"""
     try:
-        if not SMTP_USERNAME or not SMTP_PASSWORD:
+        if not MAIL_DELIVERY_CONFIGURED:
             logger.warning("SMTP credentials not configured, skipping email verification")
             return True
         
-        msg = MIMEMultipart()
-        msg['From'] = SMTP_USERNAME
-        msg['To'] = email
-        msg['Subject'] = "Park On - Email Verification"
-        
         # Send verification email
         verification_link = f"https://parkon.app/verify?token={verification_token}"
         
@@ -223,104 +531,700 @@ async def send_verification_email(email: str, verification_token: str):
         </html>
         """
         
-        msg.attach(MIMEText(body, 'html'))
-        
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(SMTP_USERNAME, SMTP_PASSWORD)
-        text = msg.as_string()
-        server.sendmail(SMTP_USERNAME, email, text)
-        server.quit()
-        
+        await mail_queue.enqueue(email, "Park On - Email Verification", body)
         return True
     except Exception as e:
-        logger.error(f"Failed to send verification email: {e}")
+        logger.error(f"Failed to queue verification email: {e}")
         return False
 
+# Shared outbound HTTP clients
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+class HTTPClientPool:
+    """Application-lifetime httpx clients, one keep-alive connection pool per upstream host"""
+    
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+    
+    def get(self, base_url: str) -> httpx.AsyncClient:
+        client = self._clients.get(base_url)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+                    max_keepalive_connections=HTTP_KEEPALIVE_CONNECTIONS_PER_HOST,
+                    keepalive_expiry=HTTP_KEEPALIVE_SECONDS
+                ),
+                timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+            )
+            self._clients[base_url] = client
+        return client
+    
+    async def close(self):
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+http_clients = HTTPClientPool()
+
+# Single-flight coalescing for upstream calls
+class SingleFlight:
+    """Share one in-flight call between concurrent callers asking for the same key"""
+    
+    def __init__(self):
+        self._in_flight: Dict[Tuple[Hashable, ...], asyncio.Task] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}
+    
+    async def do(self, key: Tuple[Hashable, ...], call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run call() for key, or wait on the call already running for it. key[0] names the upstream."""
+        counters = self.counters.setdefault(str(key[0]), {"calls": 0, "coalesced": 0})
+        counters["calls"] += 1
+        
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            counters["coalesced"] += 1
+        
+        # Shielded so one caller giving up does not cancel the call for everyone else
+        return await asyncio.shield(task)
+    
+    def _forget(self, key: Tuple[Hashable, ...], task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+    
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: {**counters, "in_flight": sum(1 for key in self._in_flight if str(key[0]) == name)}
+                for name, counters in self.counters.items()}
+
+upstream_calls = SingleFlight()
+
+# In-process caches
+class LRUCache:
+    """Size-bounded least-recently-used cache with per-entry expiry
+    
+    With max_weight, entries are also evicted until the summed weigh(value) fits within it.
+    """
+    
+    def __init__(self, max_size: int, max_weight: Optional[int] = None, weigh: Callable[[Any], int] = lambda value: 1):
+        self.max_size = max_size
+        self.max_weight = max_weight
+        self.weigh = weigh
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, int]]" = OrderedDict()
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return (found, value); a cached value may itself be None"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                self.delete(key)
+            self.misses += 1
+            return False, None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[1]
+    
+    def set(self, key: Hashable, value: Any, ttl_seconds: float):
+        self.delete(key)
+        weight = self.weigh(value)
+        self._entries[key] = (time.monotonic() + ttl_seconds, value, weight)
+        self.weight += weight
+        while len(self._entries) > self.max_size or (
+            self.max_weight is not None and self.weight > self.max_weight and len(self._entries) > 1
+        ):
+            _, (_, _, evicted_weight) = self._entries.popitem(last=False)
+            self.weight -= evicted_weight
+            self.evictions += 1
+    
+    def delete(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.weight -= entry[2]
+    
+    def clear(self):
+        self._entries.clear()
+        self.weight = 0
+    
+    def stats(self) -> Dict[str, int]:
+        stats = {"size": len(self._entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+        if self.max_weight is not None:
+            stats["weight"] = self.weight
+        return stats
+
+# Write-behind batching for MongoDB inserts
+class WriteBehindQueue:
+    """Buffers documents off the request path and writes them with insert_many
+    
+    Documents are keyed so a repeated key replaces the pending document instead of
+    queueing a duplicate. When max_pending distinct keys are waiting, new keys are
+    dropped rather than blocking the caller.
+    """
+    
+    def __init__(self, collection_name: str, batch_size: int, flush_seconds: float, max_pending: int):
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.counters = {"submitted": 0, "deduplicated": 0, "dropped": 0, "written": 0, "failed": 0}
+    
+    def submit(self, key: Hashable, document: Dict[str, Any]) -> bool:
+        """Queue a document; returns False if it was dropped because the queue is full"""
+        self.counters["submitted"] += 1
+        if key in self._pending:
+            self.counters["deduplicated"] += 1
+            self._pending[key] = document
+            return True
+        
+        if len(self._pending) >= self.max_pending:
+            self.counters["dropped"] += 1
+            return False
+        
+        self._pending[key] = document
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+        return True
+    
+    async def flush(self):
+        """Write everything pending, one insert_many per batch"""
+        while self._pending:
+            batch = []
+            while self._pending and len(batch) < self.batch_size:
+                batch.append(self._pending.popitem(last=False)[1])
+            try:
+                await db[self.collection_name].insert_many(batch, ordered=False)
+                self.counters["written"] += len(batch)
+            except Exception as e:
+                self.counters["failed"] += len(batch)
+                logger.error(f"Write-behind insert into {self.collection_name} failed: {e}")
+    
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+    
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the flush loop and write whatever is still pending"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+    
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters, "pending": len(self._pending)}
+
+parking_cache_writer = WriteBehindQueue(
+    "parking_cache",
+    batch_size=PARKING_CACHE_BATCH_SIZE,
+    flush_seconds=PARKING_CACHE_FLUSH_SECONDS,
+    max_pending=PARKING_CACHE_MAX_PENDING
+)
+
+# Durable outbound mail queue
+class MailQueue:
+    """Outbound mail stored in MongoDB and delivered by a background worker
+    
+    Messages are claimed with a lease, so several API workers can drain the same
+    collection and claims left by a crashed worker are picked up again. Each batch is
+    sent over one SMTP connection, which stays open between batches until it has been
+    idle for SMTP_IDLE_SECONDS. Failed messages are retried with exponential backoff.
+    """
+    
+    def __init__(self, collection_name: str, batch_size: int, poll_seconds: float, max_attempts: int):
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        # smtplib blocks, so the connection lives on one dedicated thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smtp")
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._smtp_used_at = 0.0
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.counters = {"queued": 0, "sent": 0, "retried": 0, "failed": 0, "connections": 0}
+    
+    async def enqueue(self, to: str, subject: str, html: str):
+        """Store a message for delivery; returns once it is durable, not once it is sent"""
+        now = datetime.utcnow()
+        await db[self.collection_name].insert_one({
+            "_id": str(uuid.uuid4()),
+            "to": to,
+            "subject": subject,
+            "html": html,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now
+        })
+        self.counters["queued"] += 1
+        self._wake.set()
+    
+    async def _claim_batch(self) -> List[Dict[str, Any]]:
+        now = datetime.utcnow()
+        batch = []
+        while len(batch) < self.batch_size:
+            message = await db[self.collection_name].find_one_and_update(
+                {"$or": [
+                    {"status": "pending", "next_attempt_at": {"$lte": now}},
+                    {"status": "sending", "locked_until": {"$lte": now}}
+                ]},
+                {"$set": {"status": "sending", "locked_until": now + timedelta(seconds=MAIL_LEASE_SECONDS)}},
+                sort=[("next_attempt_at", 1)],
+                return_document=ReturnDocument.AFTER
+            )
+            if message is None:
+                break
+            batch.append(message)
+        return batch
+    
+    def _connection(self) -> smtplib.SMTP:
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close_connection()
+        
+        smtp = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT_SECONDS)
+        if SMTP_STARTTLS:
+            smtp.starttls()
+        if SMTP_AUTH:
+            smtp.login(SMTP_USERNAME, SMTP_PASSWORD)
+        self._smtp = smtp
+        self.counters["connections"] += 1
+        return smtp
+    
+    def _close_connection(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                self._smtp.close()
+            self._smtp = None
+    
+    def _send_batch(self, batch: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """Send a batch over one connection; returns None or the error for each message"""
+        errors: List[Optional[str]] = []
+        try:
+            smtp = self._connection()
+            for message in batch:
+                msg = MIMEMultipart()
+                msg['From'] = MAIL_FROM
+                msg['To'] = message["to"]
+                msg['Subject'] = message["subject"]
+                msg.attach(MIMEText(message["html"], 'html'))
+                try:
+                    smtp.sendmail(MAIL_FROM, message["to"], msg.as_string())
+                    errors.append(None)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, smtplib.SMTPSenderRefused) as e:
+                    errors.append(str(e))
+        except (smtplib.SMTPException, OSError) as e:
+            # The connection itself failed; everything not yet sent is retried on a new one
+            self._close_connection()
+            errors.extend([str(e)] * (len(batch) - len(errors)))
+        self._smtp_used_at = time.monotonic()
+        return errors
+    
+    async def _settle(self, batch: List[Dict[str, Any]], errors: List[Optional[str]]):
+        now = datetime.utcnow()
+        operations = []
+        for message, error in zip(batch, errors):
+            if error is None:
+                update = {"status": "sent", "sent_at": now}
+                self.counters["sent"] += 1
+            else:
+                attempts = message["attempts"] + 1
+                if attempts >= self.max_attempts:
+                    update = {"status": "failed", "attempts": attempts, "last_error": error}
+                    self.counters["failed"] += 1
+                    logger.error(f"Giving up on email to {message['to']} after {attempts} attempts: {error}")
+                else:
+                    delay = min(MAIL_RETRY_MAX_SECONDS, MAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+                    update = {
+                        "status": "pending",
+                        "attempts": attempts,
+                        "last_error": error,
+                        "next_attempt_at": now + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+                    }
+                    self.counters["retried"] += 1
+            operations.append(UpdateOne({"_id": message["_id"]}, {"$set": update, "$unset": {"locked_until": ""}}))
+        await db[self.collection_name].bulk_write(operations, ordered=False)
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                batch = await self._claim_batch()
+                if batch:
+                    errors = await loop.run_in_executor(self._executor, self._send_batch, batch)
+                    await self._settle(batch, errors)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Mail queue worker error: {e}")
+            
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                if self._smtp is not None and time.monotonic() - self._smtp_used_at > SMTP_IDLE_SECONDS:
+                    await loop.run_in_executor(self._executor, self._close_connection)
+            self._wake.clear()
+    
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the worker; unsent messages stay queued in MongoDB for the next start"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._close_connection)
+    
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters, "connected": self._smtp is not None}
+
+mail_queue = MailQueue(
+    "outbound_mail",
+    batch_size=MAIL_BATCH_SIZE,
+    poll_seconds=MAIL_POLL_SECONDS,
+    max_attempts=MAIL_MAX_ATTEMPTS
+)
+
+# Rate limiting for upstream calls
+class TokenBucket:
+    """Async token bucket; acquire() waits until a token is available"""
+    
+    def __init__(self, rate_per_second: float, capacity: float = 1.0):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+# Circuit breakers for upstream endpoints
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream endpoint whose circuit is open"""
+
+class UpstreamError(Exception):
+    """Raised when an upstream endpoint answers with a non-200 status"""
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker driven by the failure rate over recent calls"""
+    
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = CIRCUIT_FAILURE_RATE,
+        minimum_calls: int = CIRCUIT_MINIMUM_CALLS,
+        window_size: int = CIRCUIT_WINDOW_SIZE,
+        open_seconds: float = CIRCUIT_OPEN_SECONDS
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate
+        self.minimum_calls = minimum_calls
+        self.open_seconds = open_seconds
+        self.state = CircuitState.CLOSED
+        self.outcomes: deque = deque(maxlen=window_size)  # True for success, False for failure
+        self.opened_at: Optional[float] = None
+        self.rejected_calls = 0
+        self._probe_in_flight = False
+    
+    def failure_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+    
+    def allow_request(self) -> bool:
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                self.rejected_calls += 1
+                return False
+            self.state = CircuitState.HALF_OPEN
+            self._probe_in_flight = False
+        
+        if self.state == CircuitState.HALF_OPEN:
+            # Only one trial call decides whether the endpoint has recovered
+            if self._probe_in_flight:
+                self.rejected_calls += 1
+                return False
+            self._probe_in_flight = True
+        
+        return True
+    
+    def record_success(self):
+        if self.state == CircuitState.HALF_OPEN:
+            self._close()
+        else:
+            self.outcomes.append(True)
+    
+    def record_failure(self):
+        if self.state == CircuitState.HALF_OPEN:
+            self._open()
+            return
+        
+        self.outcomes.append(False)
+        if len(self.outcomes) >= self.minimum_calls and self.failure_rate() >= self.failure_rate_threshold:
+            self._open()
+    
+    def record_abandoned(self):
+        """The call ended without an upstream outcome, e.g. it was cancelled; let another caller probe"""
+        self._probe_in_flight = False
+    
+    def _open(self):
+        self.state = CircuitState.OPEN
+        self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+        logger.warning(f"Circuit {self.name} opened, failure rate {self.failure_rate():.0%}")
+    
+    def _close(self):
+        self.state = CircuitState.CLOSED
+        self.outcomes.clear()
+        self.opened_at = None
+        self._probe_in_flight = False
+        logger.info(f"Circuit {self.name} closed")
+    
+    def snapshot(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == CircuitState.OPEN:
+            retry_in = max(0.0, round(self.open_seconds - (time.monotonic() - self.opened_at), 1))
+        return {
+            "state": self.state.value,
+            "failure_rate": round(self.failure_rate(), 2),
+            "recent_calls": len(self.outcomes),
+            "rejected_calls": self.rejected_calls,
+            "retry_in_seconds": retry_in
+        }
+
+class CircuitBreakerRegistry:
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+    
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = self._breakers[name] = CircuitBreaker(name)
+        return breaker
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: breaker.snapshot() for name, breaker in self._breakers.items()}
+
+circuit_breakers = CircuitBreakerRegistry()
+
+@contextmanager
+def recording_upstream_failures(breaker: CircuitBreaker):
+    """Count transport errors against the breaker; cancellation and caller errors are not the upstream's fault"""
+    try:
+        yield
+    except httpx.HTTPError:
+        breaker.record_failure()
+        raise
+    except BaseException:
+        breaker.record_abandoned()
+        raise
+
+async def upstream_get(client: httpx.AsyncClient, breaker_name: str, url: str, **kwargs) -> httpx.Response:
+    """GET through the named circuit breaker, treating errors and non-200 responses as failures"""
+    breaker = circuit_breakers.get(breaker_name)
+    if not breaker.allow_request():
+        raise CircuitOpenError(f"circuit {breaker_name} is open")
+    
+    with recording_upstream_failures(breaker):
+        response = await client.get(url, **kwargs)
+    
+    if response.status_code != 200:
+        breaker.record_failure()
+        raise UpstreamError(f"status {response.status_code}")
+    
+    breaker.record_success()
+    return response
+
+@asynccontextmanager
+async def upstream_stream(client: httpx.AsyncClient, breaker_name: str, url: str, **kwargs):
+    """Streaming GET through the named circuit breaker; the call only succeeds once the body is consumed"""
+    breaker = circuit_breakers.get(breaker_name)
+    if not breaker.allow_request():
+        raise CircuitOpenError(f"circuit {breaker_name} is open")
+    
+    async with AsyncExitStack() as stack:
+        with recording_upstream_failures(breaker):
+            response = await stack.enter_async_context(client.stream("GET", url, **kwargs))
+        if response.status_code != 200:
+            breaker.record_failure()
+            raise UpstreamError(f"status {response.status_code}")
+        # Body read errors surface in the caller's loop, so they are classified here too
+        with recording_upstream_failures(breaker):
+            yield response
+    
+    breaker.record_success()
+
+async def iter_json_array(chunks: AsyncIterator[str]) -> AsyncIterator[Any]:
+    """Yield the elements of a top-level JSON array as they arrive, buffering at most one element"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    
+    async for chunk in chunks:
+        buffer = buffer[position:] + chunk
+        position = 0
+        
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position >= len(buffer):
+                break
+            
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                position += 1
+                continue
+            
+            if buffer[position] == "]":
+                return
+            
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break  # Element is incomplete, wait for the next chunk
+            
+            # A chunk boundary can cut a number short, so an element only counts once the delimiter after it arrives
+            while end < len(buffer) and buffer[end] in " \t\r\n":
+                end += 1
+            if end >= len(buffer):
+                break
+            if buffer[end] not in ",]":
+                raise ValueError("Expected ',' or ']' after an array element")
+            position = end
+            yield item
+    
+    raise ValueError("JSON array ended unexpectedly")
+
 # TfL API Client
+TFL_BASE_URL = "https://api.tfl.gov.uk"
+
+def _int_property(properties: Dict[str, Any], *keys: str, default: int) -> int:
+    """First of keys in a TfL additionalProperties mapping that parses as an int"""
+    for key in keys:
+        try:
+            return int(properties[key])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return default
+
 class TfLClient:
+    last_good_snapshot: Optional[List[Dict[str, Any]]] = None
+    
     def __init__(self):
-        self.base_url = "https://api.tfl.gov.uk"
+        self.base_url = TFL_BASE_URL
         self.api_key = TFL_API_KEY
         
-    async def get_car_park_occupancy(self) -> List[Dict[str, Any]]:
-        """Get car park data from TfL"""
+    async def get_fallback_car_parks(self) -> List[Dict[str, Any]]:
+        """Road-derived parking, else the last good snapshot, else mock data"""
+        # Fallback to Road endpoint if CarPark fails
         try:
-            async with httpx.AsyncClient() as client:
-                params = {"app_key": self.api_key}
-                
-                # Use the correct TfL car park endpoint
-                try:
-                    response = await client.get(
-                        f"{self.base_url}/Place/Type/CarPark",
-                        params=params,
-                        timeout=15.0
-                    )
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        # Convert TfL car park data to our format
-                        return self._convert_tfl_carpark_data(data[:10])  # Limit to 10 results
-                    else:
-                        logger.warning(f"TfL CarPark endpoint failed with status {response.status_code}")
-                        
-                except Exception as e:
-                    logger.warning(f"TfL CarPark endpoint failed: {e}")
-                
-                # Fallback to Road endpoint if CarPark fails
-                try:
-                    response = await client.get(
-                        f"{self.base_url}/Road",
-                        params=params,
-                        timeout=10.0
-                    )
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        return self._convert_tfl_data_to_parking(data[:5])  # Limit to 5 results
-                        
-                except Exception as e:
-                    logger.warning(f"TfL Road endpoint failed: {e}")
-                
-                # If all endpoints fail, use mock data
-                logger.warning("All TfL endpoints failed, using mock data")
-                return self._get_mock_tfl_data()
-                        
+            client = http_clients.get(self.base_url)
+            response = await upstream_get(client, "tfl_road", "/Road", params={"app_key": self.api_key})
+            data = response.json()
+            return self._remember_snapshot(self._convert_tfl_data_to_parking(data))
         except Exception as e:
-            logger.error(f"TfL API error: {e}")
-            return self._get_mock_tfl_data()
-    
-    def _convert_tfl_carpark_data(self, carpark_data: List[Dict]) -> List[Dict[str, Any]]:
-        """Convert TfL car park data to parking spot format"""
-        parking_spots = []
+            logger.warning(f"TfL Road endpoint failed: {e}")
         
-        for i, carpark in enumerate(carpark_data):
-            if carpark.get('lat') and carpark.get('lon'):
-                # Extract additional properties for better data
-                additional_props = carpark.get('additionalProperties', [])
-                capacity = 50  # Default capacity
-                
-                # Try to find capacity in additional properties
-                for prop in additional_props:
-                    if prop.get('key') == 'Capacity':
-                        try:
-                            capacity = int(prop.get('value', 50))
-                        except:
-                            capacity = 50
-                
-                parking_spots.append({
-                    "id": f"tfl_{carpark.get('id', i)}",
-                    "name": f"TfL Car Park - {carpark.get('commonName', 'Unknown')}",
-                    "bayCount": capacity,
-                    "spacesAvailable": max(1, capacity // 3),  # Mock availability as 1/3 of capacity
-                    "lat": float(carpark['lat']),
-                    "lon": float(carpark['lon']),
-                    "lastUpdated": datetime.utcnow().isoformat(),
-                    "carParkType": "TfL Official"
-                })
+        # If all endpoints fail, keep serving the last good snapshot
+        logger.warning("All TfL endpoints failed, using last good snapshot")
+        return self._last_good_or_mock_data()
+    
+    async def iter_car_parks(self) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the full TfL car park feed, converting each record as it is parsed"""
+        client = http_clients.get(self.base_url)
+        last_updated = datetime.utcnow().isoformat()
         
+        async with upstream_stream(client, "tfl_car_park", "/Place/Type/CarPark", params={"app_key": self.api_key}) as response:
+            i = 0
+            async for carpark in iter_json_array(response.aiter_text()):
+                parking_spot = self._convert_carpark(carpark, i, last_updated)
+                i += 1
+                if parking_spot:
+                    yield parking_spot
+    
+    def _remember_snapshot(self, parking_spots: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        TfLClient.last_good_snapshot = parking_spots
         return parking_spots
     
+    def _last_good_or_mock_data(self) -> List[Dict[str, Any]]:
+        """Last successful TfL result, or mock data if TfL has never answered"""
+        if TfLClient.last_good_snapshot is not None:
+            return TfLClient.last_good_snapshot
+        return self._get_mock_tfl_data()
+    
+    def _convert_carpark(self, carpark: Dict[str, Any], i: int, last_updated: str) -> Optional[Dict[str, Any]]:
+        """Convert one TfL car park place, or None if it has no coordinates"""
+        if not (carpark.get('lat') and carpark.get('lon')):
+            return None
+        
+        # Extract additional properties for better data
+        properties = {
+            prop.get('key'): prop.get('value')
+            for prop in carpark.get('additionalProperties') or []
+        }
+        capacity = _int_property(properties, 'Capacity', 'NumberOfSpaces', default=50)
+        
+        return {
+            "id": f"tfl_{carpark.get('id', i)}",
+            "name": f"TfL Car Park - {carpark.get('commonName', 'Unknown')}",
+            "bayCount": capacity,
+            "spacesAvailable": max(1, capacity // 3),  # Mock availability as 1/3 of capacity
+            "disabledBayCount": _int_property(properties, 'NumberOfDisabledBays', default=0),
+            "lat": float(carpark['lat']),
+            "lon": float(carpark['lon']),
+            "lastUpdated": last_updated,
+            "carParkType": "TfL Official"
+        }
+    
     def _convert_tfl_data_to_parking(self, road_data: List[Dict]) -> List[Dict[str, Any]]:
         """Convert TfL road data to parking spot format"""
         parking_spots = []
@@ -666,12 +1570,79 @@ def get_mock_justpark_data() -> List[Dict[str, Any]]:
         }
     ]
 
+# Password hashing off the event loop
+class PasswordHasher:
+    """Runs bcrypt in a bounded thread pool so hashing never blocks the event loop
+    
+    bcrypt releases the GIL while it works, so threads hash in parallel. At most
+    max_pending calls may be queued or running; beyond that callers get a 503 instead
+    of piling up behind a burst of logins.
+    """
+    
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+    
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            logger.warning(f"Password hashing queue full ({self.pending} pending), rejecting request")
+            raise HTTPException(
+                status_code=503,
+                detail="Too many sign-ins in progress, please try again shortly",
+                headers={"Retry-After": "1"}
+            )
+        
+        queued_at = time.monotonic()
+        started: List[float] = []
+        
+        def timed() -> Any:
+            started.append(time.monotonic())
+            return func(*args)
+        
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        finally:
+            # Counters are only touched on the event loop, never from the pool threads
+            self.pending -= 1
+            self.completed += 1
+            if started:
+                self.wait_seconds += started[0] - queued_at
+                self.run_seconds += time.monotonic() - started[0]
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        completed = max(self.completed, 1)
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "peak_pending": self.peak_pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.wait_seconds / completed * 1000, 1),
+            "avg_run_ms": round(self.run_seconds / completed * 1000, 1)
+        }
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+
 # Utility functions
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run(pwd_context.verify, plain_password, hashed_password)
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    return await password_hasher.run(pwd_context.hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -684,61 +1655,713 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm="HS256")
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def user_access_token(user_doc: Dict[str, Any]) -> str:
+    """Access token stamped with the user's token_version, see UserCache"""
+    return create_access_token(data={"sub": user_doc["email"], "ver": user_doc.get("token_version", 0)})
+
+class UserCache:
+    """Short-lived users by token subject, so authenticated requests skip the users lookup
     
-    try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=["HS256"])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except jwt.PyJWTError:
-        raise credentials_exception
+    Tokens carry the user's token_version from when they were issued. Changes that must
+    take effect at once bump token_version in MongoDB and hand the client a fresh token,
+    so any worker holding an older cached copy refetches it on the next request. Other
+    changes reach every worker within the TTL.
+    """
+    
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.entries = LRUCache(max_size)
+        self.ttl_seconds = ttl_seconds
+    
+    async def get(self, subject: str, min_version: int) -> Optional[User]:
+        found, entry = self.entries.get(subject)
+        if found and entry[1] >= min_version:
+            return entry[0]
+        
+        user_doc = await db.users.find_one({"email": subject})
+        if user_doc is None:
+            return None
+        user = User(**user_doc)
+        self.entries.set(subject, (user, user_doc.get("token_version", 0)), self.ttl_seconds)
+        return user
     
-    user_doc = await db.users.find_one({"email": email})
-    if user_doc is None:
-        raise credentials_exception
+    def invalidate(self, subject: str):
+        self.entries.delete(subject)
     
-    return User(**user_doc)
+    def stats(self) -> Dict[str, int]:
+        return self.entries.stats()
+
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS)
+
+async def user_from_token(token: str) -> Optional[User]:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+    except jwt.PyJWTError:
+        return None
+    email = payload.get("sub")
+    if email is None:
+        return None
+    return await user_cache.get(email, payload.get("ver", 0))
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+    user = await user_from_token(credentials.credentials)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
 
 async def get_current_user_optional(credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer(auto_error=False))) -> Optional[User]:
     """Get current user if authenticated, None otherwise"""
     if not credentials:
         return None
+    return await user_from_token(credentials.credentials)
+
+# Vectorized distance engine
+EARTH_RADIUS_KM = 6371.0
+EQUIRECTANGULAR_MAX_KM = 20.0  # Within this radius the flat-earth error is under 1 metre
+
+def haversine_distances(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distances in km from one point to arrays of points"""
+    lat_rad = math.radians(lat)
+    lats_rad = np.radians(lats)
+    delta_lat = lats_rad - lat_rad
+    delta_lon = np.radians(lons - lon)
     
-    try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=["HS256"])
-        email: str = payload.get("sub")
-        if email is None:
+    a = np.sin(delta_lat / 2) ** 2 + math.cos(lat_rad) * np.cos(lats_rad) * np.sin(delta_lon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def equirectangular_distances(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Flat-earth distances in km, accurate for short ranges"""
+    x = np.radians(lons - lon) * np.cos(np.radians((lats + lat) / 2))
+    y = np.radians(lats - lat)
+    return EARTH_RADIUS_KM * np.hypot(x, y)
+
+def distances_within(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (positions, distances_km) of the points lying within radius_km"""
+    if radius_km <= EQUIRECTANGULAR_MAX_KM:
+        distances = equirectangular_distances(lat, lon, lats, lons)
+    else:
+        distances = haversine_distances(lat, lon, lats, lons)
+    
+    positions = np.flatnonzero(distances <= radius_km)
+    return positions, distances[positions]
+
+# Spatial index for parking inventory
+GRID_CELL_DEGREES = 0.01  # Roughly 1.1km of latitude, 0.7km of longitude in London
+KM_PER_DEGREE_LAT = 111.32
+
+def normalize_tfl_car_park(car_park: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a TfL car park record into an inventory record"""
+    name = car_park.get('name', 'TfL Car Park')
+    return {
+        "id": f"tfl_{car_park['id']}",
+        "provider": "tfl",
+        "name": name,
+        "lat": float(car_park['lat']),
+        "lon": float(car_park['lon']),
+        "address": name,
+        "postcode": "",
+        "spot_type": ParkingSpotType.STANDARD.value,
+        "hourly_rate": 4.00,
+        "daily_rate": 30.00,
+        "capacity": car_park.get('bayCount', 1),
+        "amenities": ["secure", "monitored"] + (["disabled_bays"] if car_park.get('disabledBayCount') else []),
+        "spaces_available": car_park.get('spacesAvailable', 0),
+        "is_real_time": True
+    }
+
+def normalize_justpark_spot(jp_spot: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a JustPark listing into an inventory record"""
+    location = jp_spot['location']
+    return {
+        "id": jp_spot['id'],
+        "provider": "justpark",
+        "name": jp_spot['name'],
+        "lat": float(location['lat']),
+        "lon": float(location['lng']),
+        "address": jp_spot['address'],
+        "postcode": jp_spot['postcode'],
+        "spot_type": jp_spot['type'],
+        "hourly_rate": jp_spot['hourly_rate'],
+        "daily_rate": jp_spot.get('daily_rate'),
+        "capacity": jp_spot['capacity'],
+        "amenities": jp_spot.get('amenities', []),
+        "spaces_available": None,
+        "is_real_time": False
+    }
+
+class SpatialGridIndex:
+    """Uniform lat/lon grid over inventory records for radius queries"""
+    
+    def __init__(self, records: List[Dict[str, Any]], cell_degrees: float = GRID_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.records = records
+        self.lats = np.array([record['lat'] for record in records], dtype=np.float64)
+        self.lons = np.array([record['lon'] for record in records], dtype=np.float64)
+        
+        members: Dict[Tuple[int, int], List[int]] = {}
+        rows = np.floor(self.lats / cell_degrees).astype(np.int64).tolist()
+        cols = np.floor(self.lons / cell_degrees).astype(np.int64).tolist()
+        for i, cell in enumerate(zip(rows, cols)):
+            members.setdefault(cell, []).append(i)
+        self.cells: Dict[Tuple[int, int], np.ndarray] = {
+            cell: np.array(positions, dtype=np.intp) for cell, positions in members.items()
+        }
+    
+    def __len__(self) -> int:
+        return len(self.records)
+    
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees))
+    
+    def _candidates(self, lat: float, lon: float, radius_km: float) -> Optional[np.ndarray]:
+        """Positions in the cells overlapping the search circle's bounding box, or None for all"""
+        lat_delta = radius_km / KM_PER_DEGREE_LAT
+        lon_delta = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01))
+        min_row, min_col = self._cell(lat - lat_delta, lon - lon_delta)
+        max_row, max_col = self._cell(lat + lat_delta, lon + lon_delta)
+        
+        # When the box covers more cells than are occupied, one batched pass over everything is cheaper
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self.cells):
             return None
-    except jwt.PyJWTError:
-        return None
+        
+        blocks = []
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                block = self.cells.get((row, col))
+                if block is not None:
+                    blocks.append(block)
+        return np.concatenate(blocks) if blocks else np.empty(0, dtype=np.intp)
     
-    user_doc = await db.users.find_one({"email": email})
-    if user_doc is None:
-        return None
+    def query_radius(self, lat: float, lon: float, radius_km: float) -> List[Tuple[Dict[str, Any], float]]:
+        """Return (record, distance_km) pairs within radius_km of the given point"""
+        candidates = self._candidates(lat, lon, radius_km)
+        if candidates is None:
+            positions, distances = distances_within(lat, lon, self.lats, self.lons, radius_km)
+        else:
+            positions, distances = distances_within(lat, lon, self.lats[candidates], self.lons[candidates], radius_km)
+            positions = candidates[positions]
+        
+        return [(self.records[i], distance) for i, distance in zip(positions.tolist(), distances.tolist())]
+
+def normalize_suggest_text(text: str) -> str:
+    """Lowercase and strip punctuation so prefixes match regardless of formatting"""
+    text = re.sub(r"['\u2019]", "", text.lower())
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+class PrefixIndex:
+    """Sorted-array prefix index from normalized keys to suggestion entries"""
+    
+    def __init__(self, entries: List[Tuple[str, Dict[str, Any]]]):
+        entries = sorted(entries, key=lambda entry: entry[0])
+        self.keys = [key for key, _ in entries]
+        self.values = [value for _, value in entries]
+    
+    def search(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        """Up to limit distinct entries whose key starts with prefix, in key order"""
+        results = []
+        seen = set()
+        for i in range(bisect_left(self.keys, prefix), len(self.keys)):
+            if not self.keys[i].startswith(prefix):
+                break
+            value = self.values[i]
+            if value["id"] in seen:
+                continue
+            seen.add(value["id"])
+            results.append(value)
+            if len(results) >= limit:
+                break
+        return results
+
+def _suggest_entries(record: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Prefix keys for a record: each word-start of its name and address, plus its postcode"""
+    suggestion = {
+        "id": record["id"],
+        "type": "car_park",
+        "label": record["name"],
+        "latitude": record["lat"],
+        "longitude": record["lon"]
+    }
+    keys = set()
+    for text in (record["name"], record["address"]):
+        words = normalize_suggest_text(text).split()
+        keys.update(" ".join(words[i:]) for i in range(len(words)))
+    if record["postcode"]:
+        keys.add(normalize_suggest_text(record["postcode"]))
+    return [(key, suggestion) for key in keys]
+
+class ParkingInventory:
+    """Searchable parking inventory with spatial and name indexes per provider"""
+    
+    def __init__(self):
+        self.indexes: Dict[str, SpatialGridIndex] = {}
+        self.name_indexes: Dict[str, PrefixIndex] = {}
+    
+    def load_provider(self, provider: str, records: List[Dict[str, Any]]):
+        """Replace a provider's records and rebuild its indexes"""
+        self.indexes[provider] = SpatialGridIndex(records)
+        self.name_indexes[provider] = PrefixIndex([entry for record in records for entry in _suggest_entries(record)])
+        logger.debug(f"Indexed {len(records)} {provider} parking records")
+    
+    def suggest(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        """Car parks whose name, address or postcode has a word starting with prefix"""
+        results: List[Dict[str, Any]] = []
+        for index in list(self.name_indexes.values()):
+            results.extend(index.search(prefix, limit - len(results)))
+            if len(results) >= limit:
+                break
+        return results
+    
+    def has_provider(self, provider: str) -> bool:
+        return provider in self.indexes
+    
+    def search(self, lat: float, lon: float, radius_km: float) -> List[Tuple[Dict[str, Any], float]]:
+        matches = []
+        for index in list(self.indexes.values()):
+            matches.extend(index.query_radius(lat, lon, radius_km))
+        return matches
+
+parking_inventory = ParkingInventory()
+
+# Shared parking inventory in MongoDB
+MONGO_EARTH_RADIUS_KM = 6378.1  # Radius MongoDB uses for spherical distances
+DUPLICATE_KEY_ERROR = 11000
+inventory_refreshed_at: Dict[str, datetime] = {}
+inventory_content_hashes: Dict[str, str] = {}
+
+def inventory_snapshot_version() -> str:
+    """Identifies the provider snapshots being served; workers holding the same records agree on it"""
+    return ",".join(f"{provider}:{inventory_content_hashes[provider]}" for provider in sorted(inventory_content_hashes))
+
+def inventory_content_hash(records: List[Dict[str, Any]]) -> str:
+    """Hash of a provider's records that does not depend on feed order"""
+    digest = hashlib.sha256()
+    for record in sorted(records, key=lambda record: record["id"]):
+        digest.update(dump_json(record))
+    return digest.hexdigest()[:16]
+
+def spot_document(record: Dict[str, Any], ingested_at: datetime) -> Dict[str, Any]:
+    """Build the parking_spots document for an inventory record"""
+    document = dict(record)
+    document["_id"] = record["id"]
+    document["location"] = {"type": "Point", "coordinates": [record["lon"], record["lat"]]}
+    document["ingested_at"] = ingested_at
+    return document
+
+async def write_spot_batch(operations: List[ReplaceOne]):
+    try:
+        await db.parking_spots.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        # A newer ingest already wrote these spots; its copy wins
+        if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details["writeErrors"]):
+            raise
+
+async def ingest_provider_records(provider: str, records: AsyncIterator[Dict[str, Any]]) -> int:
+    """Replace a provider's inventory in the parking_spots collection and the local index
+    
+    Records are written in bulk batches as they arrive, so a large feed never has to be
+    materialized as documents all at once. Every worker ingests on its own schedule, so
+    documents are stamped with the ingest's start time: a write never replaces a copy
+    from a later ingest, and the sweep only removes what no ingest since this one wrote.
+    """
+    ingested_at = datetime.utcnow()
+    indexed: List[Dict[str, Any]] = []
+    operations: List[ReplaceOne] = []
+    
+    async for record in records:
+        indexed.append(record)
+        operations.append(ReplaceOne(
+            {"_id": record["id"], "ingested_at": {"$not": {"$gt": ingested_at}}},
+            spot_document(record, ingested_at),
+            upsert=True
+        ))
+        if len(operations) >= INGEST_BATCH_SIZE:
+            await write_spot_batch(operations)
+            operations = []
+    
+    if operations:
+        await write_spot_batch(operations)
+    
+    # Anything not seen since this ingest started has been withdrawn by the provider
+    await db.parking_spots.delete_many({"provider": provider, "ingested_at": {"$not": {"$gte": ingested_at}}})
+    
+    parking_inventory.load_provider(provider, indexed)
+    inventory_refreshed_at[provider] = datetime.utcnow()
+    inventory_content_hashes[provider] = inventory_content_hash(indexed)
+    logger.info(f"Ingested {len(indexed)} {provider} parking spots")
+    return len(indexed)
+
+async def fetch_tfl_records() -> AsyncIterator[Dict[str, Any]]:
+    tfl_client = TfLClient()
+    streamed = 0
+    try:
+        async for car_park in tfl_client.iter_car_parks():
+            streamed += 1
+            yield normalize_tfl_car_park(car_park)
+        return
+    except Exception as e:
+        # A failed feed must not replace the previous snapshot, which stays the last good one
+        if streamed or "tfl" in inventory_refreshed_at:
+            raise
+        logger.warning(f"TfL CarPark feed failed: {e}")
     
-    return User(**user_doc)
+    # Nothing ingested yet, so fall back to Road-derived or mock data
+    for car_park in await tfl_client.get_fallback_car_parks():
+        if car_park.get('lat') and car_park.get('lon'):
+            yield normalize_tfl_car_park(car_park)
 
-def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Calculate distance between two points in kilometers"""
-    import math
-    R = 6371  # Earth's radius in km
+async def fetch_justpark_records() -> AsyncIterator[Dict[str, Any]]:
+    for jp_spot in get_mock_justpark_data():
+        yield normalize_justpark_spot(jp_spot)
+
+# Provider name -> (record loader, refresh interval in seconds or None if static)
+INVENTORY_PROVIDERS = {
+    "tfl": (fetch_tfl_records, TFL_REFRESH_SECONDS),
+    "justpark": (fetch_justpark_records, None),
+}
+
+inventory_refresh_tasks: Dict[str, asyncio.Task] = {}
+inventory_refresh_loops: List[asyncio.Task] = []
+
+async def refresh_provider_inventory(provider: str) -> int:
+    fetch_records, _ = INVENTORY_PROVIDERS[provider]
+    return await upstream_calls.do(("inventory", provider), lambda: ingest_provider_records(provider, fetch_records()))
+
+def _inventory_is_stale(provider: str, now: datetime) -> bool:
+    _, refresh_seconds = INVENTORY_PROVIDERS[provider]
+    refreshed_at = inventory_refreshed_at.get(provider)
+    if refreshed_at is None:
+        return True
+    return refresh_seconds is not None and now - refreshed_at > timedelta(seconds=refresh_seconds)
+
+async def ensure_inventory():
+    """Ingest any provider whose inventory is missing or older than its refresh interval"""
+    now = datetime.utcnow()
+    for provider in INVENTORY_PROVIDERS:
+        if _inventory_is_stale(provider, now):
+            await refresh_provider_inventory(provider)
+
+async def _refresh_provider_in_background(provider: str):
+    try:
+        await refresh_provider_inventory(provider)
+    except Exception as e:
+        logger.error(f"Background {provider} inventory refresh failed: {e}")
+
+def schedule_inventory_refresh(provider: str) -> asyncio.Task:
+    """Start a background refresh for a provider unless one is already running"""
+    task = inventory_refresh_tasks.get(provider)
+    if task is None or task.done():
+        task = asyncio.create_task(_refresh_provider_in_background(provider))
+        inventory_refresh_tasks[provider] = task
+    return task
+
+def revalidate_inventory():
+    """Schedule refreshes for stale providers; searches keep using the current snapshot meanwhile"""
+    now = datetime.utcnow()
+    for provider in INVENTORY_PROVIDERS:
+        if _inventory_is_stale(provider, now):
+            schedule_inventory_refresh(provider)
+
+async def refresh_inventory_periodically(provider: str, interval_seconds: float):
+    """Keep a provider's snapshot fresh so searches never fetch on the request path"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        await schedule_inventory_refresh(provider)
+
+def start_inventory_refresh_loops():
+    for provider, (_, refresh_seconds) in INVENTORY_PROVIDERS.items():
+        if refresh_seconds is not None:
+            inventory_refresh_loops.append(asyncio.create_task(refresh_inventory_periodically(provider, refresh_seconds)))
+
+async def stop_inventory_refresh_loops():
+    tasks = inventory_refresh_loops + [task for task in inventory_refresh_tasks.values() if not task.done()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    inventory_refresh_loops.clear()
+
+def _matches_filters(record: Dict[str, Any], spot_type: Optional[ParkingSpotType], max_price: Optional[float]) -> bool:
+    if spot_type and record['spot_type'] != spot_type.value:
+        return False
+    if max_price and record['hourly_rate'] > max_price:
+        return False
+    return True
+
+async def find_parking_spots(
+    lat: float,
+    lon: float,
+    radius_km: float,
+    spot_type: Optional[ParkingSpotType] = None,
+    max_price: Optional[float] = None
+) -> List[Tuple[Dict[str, Any], float]]:
+    """Return (record, distance_km) pairs within radius_km, nearest first"""
+    query: Dict[str, Any] = {}
+    if spot_type:
+        query["spot_type"] = spot_type.value
+    if max_price:
+        query["hourly_rate"] = {"$lte": max_price}
+    
+    try:
+        pipeline = [{
+            "$geoNear": {
+                "near": {"type": "Point", "coordinates": [lon, lat]},
+                "distanceField": "distance_m",
+                # Widened to MongoDB's earth radius; exact distances are recomputed below
+                "maxDistance": radius_km * 1000 * MONGO_EARTH_RADIUS_KM / EARTH_RADIUS_KM,
+                "spherical": True,
+                "query": query
+            }
+        }, {
+            # Keep cached candidates to the inventory record itself
+            "$project": {"location": 0, "ingested_at": 0, "distance_m": 0}
+        }]
+        records = await db.parking_spots.aggregate(pipeline).to_list(length=None)
+    except Exception as e:
+        logger.warning(f"Geo query failed, searching local inventory: {e}")
+        matches = [
+            (record, distance) for record, distance in parking_inventory.search(lat, lon, radius_km)
+            if _matches_filters(record, spot_type, max_price)
+        ]
+        matches.sort(key=lambda match: match[1])
+        return matches
     
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
+    if not records:
+        return []
     
-    a = (math.sin(delta_lat/2)**2 + 
-         math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon/2)**2)
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    lats = np.array([record['lat'] for record in records], dtype=np.float64)
+    lons = np.array([record['lon'] for record in records], dtype=np.float64)
+    positions, distances = distances_within(lat, lon, lats, lons, radius_km)
+    return [(records[i], distance) for i, distance in zip(positions.tolist(), distances.tolist())]
+
+def build_parking_spot(record: Dict[str, Any], distance: Optional[float], is_premium: bool) -> ParkingSpot:
+    """Materialize an inventory record as a ParkingSpot for the response"""
+    if record['is_real_time']:
+        # For premium users, show real-time availability
+        spaces_available = record.get('spaces_available', 0) if is_premium else None
+        spot_status = ParkingSpotStatus.AVAILABLE if spaces_available and spaces_available > 0 else ParkingSpotStatus.OCCUPIED
+        is_real_time = is_premium
+    else:
+        spot_status = ParkingSpotStatus.AVAILABLE
+        is_real_time = False
     
-    return R * c
+    return ParkingSpot(
+        id=record['id'],
+        location=Location(
+            latitude=record['lat'],
+            longitude=record['lon'],
+            address=record['address'],
+            postcode=record['postcode'],
+            city="London"
+        ),
+        name=record['name'],
+        status=spot_status,
+        spot_type=ParkingSpotType(record['spot_type']),
+        pricing=ParkingPricing(
+            hourly_rate=record['hourly_rate'],
+            daily_rate=record['daily_rate']
+        ),
+        capacity=record['capacity'],
+        amenities=record['amenities'],
+        provider=record['provider'],
+        is_real_time=is_real_time,
+        distance_km=round(distance, 2) if distance is not None else None,
+        walk_time_mins=int(distance * 12) if distance is not None else None  # Approximate walking time
+    )
+
+# Search result cache
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def geohash_cell(lat: float, lon: float, precision: int) -> Tuple[str, float, float, float, float]:
+    """Geohash of a point plus its cell's centre and half-height/half-width in degrees"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    
+    while len(chars) < precision:
+        value, bounds = (lon, lon_range) if even else (lat, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    
+    return (
+        "".join(chars),
+        (lat_range[0] + lat_range[1]) / 2,
+        (lon_range[0] + lon_range[1]) / 2,
+        (lat_range[1] - lat_range[0]) / 2,
+        (lon_range[1] - lon_range[0]) / 2
+    )
+
+class CachedCandidates:
+    """Inventory records around a geohash cell, with columns for re-ranking from any point in it
+    
+    Ranking only touches the columns; ParkingSpot models are built just for the spots a
+    response actually returns.
+    """
+    
+    __slots__ = ("lats", "lons", "ids", "records")
+    
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.records = records
+        self.ids = np.array([record['id'] for record in records], dtype=object)
+        self.lats = np.array([record['lat'] for record in records], dtype=np.float64)
+        self.lons = np.array([record['lon'] for record in records], dtype=np.float64)
+
+class SearchResultCache:
+    """LRU of search candidates per quantized query, emptied whenever the inventory snapshot changes
+    
+    Dense areas produce entries thousands of candidates long, so the cache is bounded by the
+    total number of candidates it holds as well as by the number of entries.
+    """
+    
+    def __init__(self, max_size: int, max_candidates: int, ttl_seconds: float):
+        self.entries = LRUCache(max_size, max_candidates, lambda candidates: len(candidates.ids))
+        self.ttl_seconds = ttl_seconds
+        self.version: Optional[str] = None
+        self.invalidations = 0
+    
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[CachedCandidates]:
+        version = inventory_snapshot_version()
+        if version != self.version:
+            if self.version is not None:
+                self.invalidations += 1
+            self.entries.clear()
+            self.version = version
+        found, candidates = self.entries.get(key)
+        return candidates if found else None
+    
+    def put(self, key: Tuple[Hashable, ...], candidates: CachedCandidates):
+        self.entries.set(key, candidates, self.ttl_seconds)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {**self.entries.stats(), "invalidations": self.invalidations}
+
+search_cache = SearchResultCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_MAX_CANDIDATES, SEARCH_CACHE_TTL_SECONDS)
+
+def encode_search_cursor(key: Tuple[float, str]) -> str:
+    """Opaque cursor for the (distance, id) of the last spot on a page"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+def decode_search_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        distance, spot_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(distance), str(spot_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+async def search_candidates(
+    lat: float,
+    lon: float,
+    radius_km: float,
+    spot_type: Optional[ParkingSpotType],
+    max_price: Optional[float]
+) -> CachedCandidates:
+    """Candidate spots covering radius_km around any point in the geohash cell of (lat, lon)
+    
+    Candidates are cached for the whole cell and rounded-up radius, so callers get exact
+    distances and an exact radius cut-off by ranking the cached columns from their own point.
+    """
+    cell, center_lat, center_lon, half_height, half_width = geohash_cell(lat, lon, SEARCH_CACHE_GEOHASH_PRECISION)
+    radius_bucket_km = math.ceil(radius_km / SEARCH_CACHE_RADIUS_STEP_KM) * SEARCH_CACHE_RADIUS_STEP_KM
+    key = (cell, radius_bucket_km, spot_type, max_price)
+    
+    candidates = search_cache.get(key)
+    if candidates is None:
+        # Reach far enough from the cell centre to cover the bucket radius from any point in the cell
+        half_diagonal_km = math.hypot(
+            half_height * KM_PER_DEGREE_LAT,
+            half_width * KM_PER_DEGREE_LAT * math.cos(math.radians(center_lat))
+        )
+        matches = await find_parking_spots(center_lat, center_lon, radius_bucket_km + half_diagonal_km, spot_type, max_price)
+        candidates = CachedCandidates([record for record, _ in matches])
+        search_cache.put(key, candidates)
+    return candidates
+
+def rank_candidates(
+    candidates: CachedCandidates,
+    lat: float,
+    lon: float,
+    radius_km: float,
+    after: Optional[Tuple[float, str]] = None,
+    limit: Optional[int] = None
+) -> Tuple[List[Tuple[float, str, int]], int]:
+    """Unordered (distance, id, position) entries within radius_km past the cursor, and the total match count
+    
+    With a limit, entries that cannot be among the nearest limit are dropped on the columns first.
+    """
+    if not candidates.records:
+        return [], 0
+    
+    positions, distances = distances_within(lat, lon, candidates.lats, candidates.lons, radius_km)
+    total = len(positions)
+    if after is not None:
+        after_distance, after_id = after
+        keep = (distances > after_distance) | ((distances == after_distance) & (candidates.ids[positions] > after_id))
+        positions, distances = positions[keep], distances[keep]
+    if limit is not None and len(distances) > limit:
+        # Everything in the nearest limit is no further than the limit-th smallest distance
+        keep = distances <= np.partition(distances, limit - 1)[limit - 1]
+        positions, distances = positions[keep], distances[keep]
+    
+    ranked = [
+        (distance, candidates.ids[position], position)
+        for position, distance in zip(positions.tolist(), distances.tolist())
+    ]
+    return ranked, total
+
+async def search_spots_page(
+    lat: float,
+    lon: float,
+    radius_km: float,
+    spot_type: Optional[ParkingSpotType],
+    max_price: Optional[float],
+    is_premium: bool,
+    limit: int,
+    after: Optional[Tuple[float, str]] = None
+) -> Tuple[List[ParkingSpot], int, Optional[Tuple[float, str]]]:
+    """One page of spots within radius_km, ordered by (distance, id)
+    
+    Returns the page, the total number of matches and the key to continue after, if any.
+    Only the page itself is selected (heap top-k) and materialized; the rest is never sorted.
+    """
+    candidates = await search_candidates(lat, lon, radius_km, spot_type, max_price)
+    # One extra tells us whether another page follows
+    ranked, total = rank_candidates(candidates, lat, lon, radius_km, after, limit + 1)
+    page = heapq.nsmallest(limit + 1, ranked)
+    next_key = page[limit - 1][:2] if len(page) > limit else None
+    
+    spots = [build_parking_spot(candidates.records[position], distance, is_premium) for distance, _, position in page[:limit]]
+    return spots, total, next_key
+
+async def stream_search_spots(
+    candidates: CachedCandidates,
+    ranked: List[Tuple[float, str, int]],
+    is_premium: bool,
+    include: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[str]:
+    """Yield one NDJSON line per spot, nearest first
+    
+    The heap is popped lazily, so the nearest spots go out before the far end is ever ordered.
+    """
+    heapq.heapify(ranked)
+    while ranked:
+        distance, _, position = heapq.heappop(ranked)
+        spot = build_parking_spot(candidates.records[position], distance, is_premium)
+        yield spot.model_dump_json(include=include) + "\n"
 
 # Authentication endpoints
 @api_router.post("/auth/register", response_model=APIResponse)
@@ -753,7 +2376,7 @@ async def register_user(user_data: UserCreate):
     verification_token = str(uuid.uuid4())
     
     # Hash password and create user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
     user = User(
         email=user_data.email,
         full_name=user_data.full_name,
@@ -771,7 +2394,7 @@ async def register_user(user_data: UserCreate):
     await send_verification_email(user.email, verification_token)
     
     # Create access token
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = user_access_token(user_dict)
     
     return APIResponse(
         success=True,
@@ -782,16 +2405,17 @@ async def register_user(user_data: UserCreate):
 @api_router.get("/verify")
 async def verify_email(token: str):
     """Verify user email address"""
-    user_doc = await db.users.find_one({"verification_token": token})
-    if not user_doc:
-        raise HTTPException(status_code=400, detail="Invalid verification token")
-    
-    await db.users.update_one(
+    user_doc = await db.users.find_one_and_update(
         {"verification_token": token},
-        {"$set": {"is_verified": True}, "$unset": {"verification_token": ""}}
+        {"$set": {"is_verified": True}, "$unset": {"verification_token": ""}, "$inc": {"token_version": 1}},
+        return_document=ReturnDocument.AFTER
     )
+    if not user_doc:
+        raise HTTPException(status_code=400, detail="Invalid verification token")
+    user_cache.invalidate(user_doc["email"])
     
-    return {"message": "Email verified successfully"}
+    # Tokens issued before verification no longer match token_version, so hand out a fresh one
+    return {"message": "Email verified successfully", "access_token": user_access_token(user_doc), "token_type": "bearer"}
 
 @api_router.post("/auth/login", response_model=APIResponse)
 async def login_user(login_data: UserLogin):
@@ -800,11 +2424,11 @@ async def login_user(login_data: UserLogin):
     if not user_doc:
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
-    if not verify_password(login_data.password, user_doc["hashed_password"]):
+    if not await verify_password(login_data.password, user_doc["hashed_password"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     user = User(**user_doc)
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = user_access_token(user_doc)
     
     return APIResponse(
         success=True,
@@ -834,38 +2458,305 @@ async def create_guest_session():
 
 # Parking search endpoints
 # Geocoding helper function
-async def geocode_address(address: str) -> Optional[Dict[str, float]]:
-    """Convert address/postcode to coordinates using Nominatim"""
-    try:
-        async with httpx.AsyncClient() as client:
-            # Use Nominatim API for geocoding
-            params = {
-                'q': f"{address}, London, UK",
-                'format': 'json',
-                'addressdetails': '1',
-                'limit': '1'
-            }
-            
-            response = await client.get(
-                'https://nominatim.openstreetmap.org/search',
-                params=params,
-                headers={'User-Agent': 'ParkOn/1.0'}
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data and len(data) > 0:
-                    result = data[0]
-                    return {
-                        'latitude': float(result['lat']),
-                        'longitude': float(result['lon']),
-                        'display_name': result.get('display_name', address)
-                    }
+# Offline postcode gazetteer
+POSTCODE_PATTERN = re.compile(r"^([A-Z]{1,2}[0-9][A-Z0-9]?)([0-9][A-Z]{2})$")
+OUTWARD_CODE_PATTERN = re.compile(r"^[A-Z]{1,2}[0-9][A-Z0-9]?$")
+OUTWARD_PREFIX_PATTERN = re.compile(r"^[A-Z]{1,2}[0-9]")
+POSTCODE_COLUMNS = ("postcode", "pcds", "pcd")
+LATITUDE_COLUMNS = ("latitude", "lat")
+LONGITUDE_COLUMNS = ("longitude", "long", "lon", "lng")
+
+def normalize_postcode(text: str) -> str:
+    return re.sub(r"\s+", "", text).upper()
+
+def _pick_column(fieldnames: List[str], candidates: Tuple[str, ...]) -> str:
+    lowered = {name.strip().lower(): name for name in fieldnames}
+    for candidate in candidates:
+        if candidate in lowered:
+            return lowered[candidate]
+    raise ValueError(f"Postcode CSV has none of the columns {candidates}")
+
+class PostcodeGazetteer:
+    """Postcode and outward code centroids in sorted NumPy arrays, searched by bisection"""
+    
+    def __init__(self):
+        empty = (np.empty(0, dtype="S7"), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32))
+        self._postcodes = empty
+        self._outward_codes = empty
+    
+    def __len__(self) -> int:
+        return len(self._postcodes[0])
+    
+    def load_csv(self, path: str):
+        """Load postcode centroids from a CSV; runs in a worker thread at startup"""
+        keys: List[bytes] = []
+        lats: List[float] = []
+        lons: List[float] = []
+        
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            postcode_column = _pick_column(reader.fieldnames or [], POSTCODE_COLUMNS)
+            lat_column = _pick_column(reader.fieldnames or [], LATITUDE_COLUMNS)
+            lon_column = _pick_column(reader.fieldnames or [], LONGITUDE_COLUMNS)
             
+            for row in reader:
+                key = normalize_postcode(row[postcode_column] or "")
+                try:
+                    lat = float(row[lat_column])
+                    lon = float(row[lon_column])
+                except (TypeError, ValueError):
+                    continue
+                # Terminated or unlocated postcodes carry placeholder coordinates
+                if not POSTCODE_PATTERN.match(key) or abs(lat) > 90 or abs(lon) > 180:
+                    continue
+                keys.append(key.encode("ascii"))
+                lats.append(lat)
+                lons.append(lon)
+        
+        postcodes = np.array(keys, dtype="S7")
+        order = np.argsort(postcodes, kind="stable")
+        postcodes = postcodes[order]
+        postcode_lats = np.array(lats, dtype=np.float32)[order]
+        postcode_lons = np.array(lons, dtype=np.float32)[order]
+        
+        # Outward code centroid is the mean of its postcodes
+        outward = np.array([key[:-3] for key in postcodes.tolist()], dtype="S4")
+        outward_codes, inverse, counts = np.unique(outward, return_inverse=True, return_counts=True)
+        outward_lats = (np.bincount(inverse, weights=postcode_lats) / counts).astype(np.float32)
+        outward_lons = (np.bincount(inverse, weights=postcode_lons) / counts).astype(np.float32)
+        
+        self._postcodes = (postcodes, postcode_lats, postcode_lons)
+        self._outward_codes = (outward_codes, outward_lats, outward_lons)
+        logger.info(f"Loaded {len(postcodes)} postcodes in {len(outward_codes)} outward codes from {path}")
+    
+    @staticmethod
+    def _find(table: Tuple[np.ndarray, np.ndarray, np.ndarray], key: str) -> Optional[Tuple[float, float]]:
+        keys, lats, lons = table
+        encoded = key.encode("ascii")
+        i = int(np.searchsorted(keys, encoded))
+        if i < len(keys) and keys[i] == encoded:
+            return round(float(lats[i]), 6), round(float(lons[i]), 6)
+        return None
+    
+    def lookup(self, query: str) -> Optional[Dict[str, Any]]:
+        """Resolve a full postcode or an outward code, or None for anything else"""
+        key = normalize_postcode(query)
+        match = POSTCODE_PATTERN.match(key)
+        if match:
+            found = self._find(self._postcodes, key)
+            display_name = f"{match.group(1)} {match.group(2)}"
+        elif OUTWARD_CODE_PATTERN.match(key):
+            found = self._find(self._outward_codes, key)
+            display_name = key
+        else:
+            return None
+        
+        if found is None:
             return None
+        return {'latitude': found[0], 'longitude': found[1], 'display_name': f"{display_name}, London, UK"}
+    
+    @staticmethod
+    def _prefix_range(keys: np.ndarray, prefix: bytes) -> range:
+        start = int(np.searchsorted(keys, prefix, side="left"))
+        end = int(np.searchsorted(keys, prefix + b"\xff", side="left"))
+        return range(start, end)
+    
+    def suggest(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        """Outward codes, then full postcodes, starting with prefix"""
+        key = normalize_postcode(prefix)
+        if not key.isascii() or not key.isalnum() or not key[0].isalpha():
+            return []
+        encoded = key.encode("ascii")
+        
+        results = []
+        for table, kind in ((self._outward_codes, "outward_code"), (self._postcodes, "postcode")):
+            keys, lats, lons = table
+            for i in self._prefix_range(keys, encoded)[:limit - len(results)]:
+                code = keys[i].decode("ascii")
+                label = code if kind == "outward_code" else f"{code[:-3]} {code[-3:]}"
+                results.append({
+                    "id": label,
+                    "type": kind,
+                    "label": label,
+                    "latitude": round(float(lats[i]), 6),
+                    "longitude": round(float(lons[i]), 6)
+                })
+        return results
+
+postcode_gazetteer = PostcodeGazetteer()
+
+geocode_cache = LRUCache(GEOCODE_CACHE_SIZE)
+
+def normalize_geocode_query(query: str) -> str:
+    """Fold case and whitespace so equivalent queries share a cache entry"""
+    return " ".join(query.split()).lower()
+
+def lookup_geocode_in_memory(address: str) -> Optional[Tuple[str, Optional[Dict[str, Any]]]]:
+    """(source, result) from the gazetteer or the LRU, or None if neither knows the query"""
+    local = postcode_gazetteer.lookup(address)
+    if local:
+        return "gazetteer", local
+    
+    found, result = geocode_cache.get(normalize_geocode_query(address))
+    if found:
+        return "cache", result
+    return None
+
+async def lookup_geocode_documents(keys: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Unexpired Mongo cache entries for normalized keys, promoted into the LRU"""
+    now = datetime.utcnow()
+    results = {}
+    try:
+        async for cached in db.geocode_cache.find({"_id": {"$in": keys}, "expires_at": {"$gt": now}}):
+            geocode_cache.set(cached["_id"], cached["result"], (cached["expires_at"] - now).total_seconds())
+            results[cached["_id"]] = cached["result"]
     except Exception as e:
+        logger.warning(f"Geocode cache lookup failed: {e}")
+    return results
+
+async def geocode_address(address: str) -> Optional[Dict[str, float]]:
+    """Convert address/postcode to coordinates via the gazetteer, the LRU, the Mongo cache, then Nominatim"""
+    _, result = await geocode_address_with_source(address)
+    return result
+
+async def geocode_address_with_source(address: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """(source, result) for an address; the source is "error" when Nominatim could not be asked"""
+    local = lookup_geocode_in_memory(address)
+    if local:
+        return local
+    
+    key = normalize_geocode_query(address)
+    cached = await lookup_geocode_documents([key])
+    if key in cached:
+        return "cache", cached[key]
+    
+    try:
+        result = await upstream_calls.do(("nominatim", key), lambda: _geocode_with_nominatim(address))
+    except Exception as e:
+        # Upstream failures are not cached; only genuine misses are
         logger.error(f"Geocoding error: {e}")
-        return None
+        return "error", None
+    
+    ttl_seconds = GEOCODE_CACHE_TTL_SECONDS if result else GEOCODE_NEGATIVE_TTL_SECONDS
+    geocode_cache.set(key, result, ttl_seconds)
+    try:
+        await db.geocode_cache.replace_one(
+            {"_id": key},
+            {"result": result, "expires_at": datetime.utcnow() + timedelta(seconds=ttl_seconds)},
+            upsert=True
+        )
+    except Exception as e:
+        logger.warning(f"Geocode cache write failed: {e}")
+    
+    return "nominatim", result
+
+batch_geocode_slots = asyncio.Semaphore(GEOCODE_BATCH_CONCURRENCY)
+
+async def _geocode_for_batch(key: str, address: str) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+    async with batch_geocode_slots:
+        # Another batch may have resolved it while this one waited for a slot
+        return (key, *await geocode_address_with_source(address))
+
+async def stream_batch_geocode(queries: List[str]) -> AsyncIterator[str]:
+    """Yield one NDJSON line per distinct query, cached answers first, the rest as Nominatim returns them"""
+    groups: Dict[str, List[str]] = {}
+    for query in dict.fromkeys(queries):
+        groups.setdefault(normalize_geocode_query(query), []).append(query)
+    
+    def lines(key: str, result: Optional[Dict[str, Any]], source: str) -> str:
+        return "".join(json.dumps({"query": query, "result": result, "source": source}) + "\n" for query in groups[key])
+    
+    misses = []
+    for key, originals in groups.items():
+        if not key:
+            yield lines(key, None, "invalid")
+            continue
+        local = lookup_geocode_in_memory(originals[0])
+        if local:
+            yield lines(key, local[1], local[0])
+        else:
+            misses.append(key)
+    
+    cached = await lookup_geocode_documents(misses) if misses else {}
+    for key in cached:
+        yield lines(key, cached[key], "cache")
+    
+    tasks = [asyncio.ensure_future(_geocode_for_batch(key, groups[key][0])) for key in misses if key not in cached]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            key, source, result = await finished
+            yield lines(key, result, source)
+    finally:
+        # The client may disconnect part way through; stop spending rate-limited calls on it
+        for task in tasks:
+            task.cancel()
+
+# Shared by every geocode so single lookups and concurrent imports cannot exceed Nominatim's rate together
+nominatim_rate_limit = TokenBucket(NOMINATIM_REQUESTS_PER_SECOND)
+
+async def _geocode_with_nominatim(address: str) -> Optional[Dict[str, float]]:
+    """Convert address/postcode to coordinates using Nominatim, or None if nothing matched"""
+    await nominatim_rate_limit.acquire()
+    client = http_clients.get(NOMINATIM_BASE_URL)
+    # Use Nominatim API for geocoding
+    params = {
+        'q': f"{address}, London, UK",
+        'format': 'json',
+        'addressdetails': '1',
+        'limit': '1'
+    }
+    
+    response = await upstream_get(
+        client,
+        "nominatim_search",
+        '/search',
+        params=params,
+        headers={'User-Agent': 'ParkOn/1.0'}
+    )
+    
+    data = response.json()
+    if data and len(data) > 0:
+        result = data[0]
+        return {
+            'latitude': float(result['lat']),
+            'longitude': float(result['lon']),
+            'display_name': result.get('display_name', address)
+        }
+    
+    return None
+
+@api_router.get("/geocode/suggest", response_model=APIResponse)
+async def suggest_locations(
+    q: str = Query(..., min_length=1, description="Partial postcode, station or car park name"),
+    limit: int = Query(8, ge=1, le=20)
+):
+    """Autocomplete locations from local indexes without calling out to a geocoder"""
+    if not normalize_suggest_text(q):
+        return APIResponse(success=True, data=[], message="Found 0 suggestions")
+    
+    postcodes = postcode_gazetteer.suggest(q, limit)
+    places = parking_inventory.suggest(normalize_suggest_text(q), limit)
+    
+    # Postcode-shaped input ranks postcodes first, anything else ranks named places first
+    if OUTWARD_PREFIX_PATTERN.match(normalize_postcode(q)):
+        suggestions = postcodes + places
+    else:
+        suggestions = places + postcodes
+    
+    return APIResponse(
+        success=True,
+        data=suggestions[:limit],
+        message=f"Found {min(len(suggestions), limit)} suggestions"
+    )
+
+@api_router.post("/geocode/batch")
+async def batch_geocode(batch_request: BatchGeocodeRequest):
+    """Geocode many addresses, streaming one NDJSON line per query as results become available"""
+    return StreamingResponse(
+        stream_batch_geocode(batch_request.queries),
+        media_type="application/x-ndjson",
+        headers=STREAM_HEADERS
+    )
 
 @api_router.get("/geocode", response_model=APIResponse)
 async def geocode_location(
@@ -890,13 +2781,18 @@ async def geocode_location(
         logger.error(f"Geocoding endpoint error: {e}")
         raise HTTPException(status_code=500, detail="Geocoding failed")
 
-@api_router.get("/parking/search", response_model=APIResponse)
+@api_router.get("/parking/search", response_model=PaginatedAPIResponse)
 async def search_parking_spots(
+    request: Request,
     latitude: float = Query(..., ge=-90, le=90),
     longitude: float = Query(..., ge=-180, le=180),
     radius_miles: float = Query(1.2, ge=0.1, le=10.0, description="Search radius in miles"),
     spot_type: Optional[str] = Query(None),
     max_price: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100, description="Spots per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    stream: bool = Query(False, description="Stream every match as NDJSON in distance order instead of one page"),
+    fields: Optional[str] = Query(None, description="Comma-separated spot fields to return, e.g. id,name,distance_km,pricing.hourly_rate,status"),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     """Search for parking spots near location"""
@@ -925,112 +2821,71 @@ async def search_parking_spots(
             except ValueError:
                 raise HTTPException(status_code=422, detail=f"Invalid max_price: {max_price}")
         
+        after = None
+        if cursor:
+            try:
+                after = decode_search_cursor(cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=422, detail=str(e))
+        
+        try:
+            include = parse_fields(fields, ParkingSpot)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        
         # Convert miles to kilometers for internal calculations
         radius_km = radius_miles * 1.60934
         
-        all_spots = []
+        # Serve the current snapshot; stale providers are refreshed in the background
+        revalidate_inventory()
         
-        # Get TfL car park data (always available)
-        tfl_client = TfLClient()
-        tfl_data = await tfl_client.get_car_park_occupancy()
+        # Radius, type and price filters are all answered by the inventory query
+        is_premium = bool(current_user and current_user.role == UserRole.PREMIUM)
         
-        for car_park in tfl_data:
-            if car_park.get('lat') and car_park.get('lon'):
-                distance = calculate_distance(
-                    latitude, longitude,
-                    float(car_park['lat']), float(car_park['lon'])
-                )
-                
-                if distance <= radius_km:
-                    # For premium users, show real-time availability
-                    is_premium = current_user and current_user.role == UserRole.PREMIUM
-                    spaces_available = car_park.get('spacesAvailable', 0) if is_premium else None
-                    
-                    spot = ParkingSpot(
-                        id=f"tfl_{car_park['id']}",
-                        location=Location(
-                            latitude=float(car_park['lat']),
-                            longitude=float(car_park['lon']),
-                            address=car_park.get('name', 'TfL Car Park'),
-                            postcode="",
-                            city="London"
-                        ),
-                        name=car_park.get('name', 'TfL Car Park'),
-                        status=ParkingSpotStatus.AVAILABLE if spaces_available and spaces_available > 0 else ParkingSpotStatus.OCCUPIED,
-                        spot_type=ParkingSpotType.STANDARD,
-                        pricing=ParkingPricing(hourly_rate=4.00, daily_rate=30.00),
-                        capacity=car_park.get('bayCount', 1),
-                        amenities=["secure", "monitored"],
-                        provider="tfl",
-                        is_real_time=bool(is_premium),
-                        distance_km=round(distance, 2),
-                        walk_time_mins=int(distance * 12)  # Approximate walking time
-                    )
-                    all_spots.append(spot)
-        
-        # Get JustPark mock data
-        justpark_data = get_mock_justpark_data()
+        # Results only change with the inventory snapshot, so clients can revalidate for free
+        cache_headers = {
+            "ETag": make_etag(inventory_snapshot_version(), is_premium, sorted(request.query_params.multi_items())),
+            "Cache-Control": f"{'private' if is_premium else 'public'}, max-age={SEARCH_MAX_AGE_SECONDS}",
+            "Vary": "Authorization"
+        }
+        if etag_matches(request, cache_headers["ETag"]):
+            return not_modified(cache_headers)
         
-        for jp_spot in justpark_data:
-            location = jp_spot['location']
-            distance = calculate_distance(
-                latitude, longitude,
-                location['lat'], location['lng']
+        if stream:
+            candidates = await search_candidates(latitude, longitude, radius_km, parsed_spot_type, parsed_max_price)
+            ranked, total = rank_candidates(candidates, latitude, longitude, radius_km, after)
+            return StreamingResponse(
+                stream_search_spots(candidates, ranked, is_premium, include),
+                media_type="application/x-ndjson",
+                headers={**cache_headers, **STREAM_HEADERS, "X-Total-Count": str(total)}
             )
-            
-            if distance <= radius_km:
-                spot = ParkingSpot(
-                    id=jp_spot['id'],
-                    location=Location(
-                        latitude=location['lat'],
-                        longitude=location['lng'],
-                        address=jp_spot['address'],
-                        postcode=jp_spot['postcode'],
-                        city="London"
-                    ),
-                    name=jp_spot['name'],
-                    status=ParkingSpotStatus.AVAILABLE,
-                    spot_type=ParkingSpotType(jp_spot['type']),
-                    pricing=ParkingPricing(
-                        hourly_rate=jp_spot['hourly_rate'],
-                        daily_rate=jp_spot.get('daily_rate')
-                    ),
-                    capacity=jp_spot['capacity'],
-                    amenities=jp_spot.get('amenities', []),
-                    provider="justpark",
-                    is_real_time=False,
-                    distance_km=round(distance, 2),
-                    walk_time_mins=int(distance * 12)
-                )
-                all_spots.append(spot)
         
-        # Apply filters
-        if parsed_spot_type:
-            all_spots = [spot for spot in all_spots if spot.spot_type == parsed_spot_type]
-        
-        if parsed_max_price:
-            all_spots = [spot for spot in all_spots if spot.pricing.hourly_rate <= parsed_max_price]
-        
-        # Sort by distance
-        all_spots.sort(key=lambda x: x.distance_km or 0)
+        spots, total, next_key = await search_spots_page(
+            latitude, longitude, radius_km, parsed_spot_type, parsed_max_price, is_premium, limit, after
+        )
         
-        # Cache results for offline access
-        cache_data = {
-            "spots": [spot.dict() for spot in all_spots],
-            "search_params": {
-                "latitude": latitude,
-                "longitude": longitude,
-                "radius_miles": radius_miles
-            },
-            "cached_at": datetime.utcnow()
-        }
-        await db.parking_cache.insert_one(cache_data)
+        # Cache the first page for offline access
+        if after is None:
+            cache_data = {
+                "spots": [spot.dict() for spot in spots],
+                "total": total,
+                "search_params": {
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "radius_miles": radius_miles
+                },
+                "cached_at": datetime.utcnow()
+            }
+            cache_key = (latitude, longitude, radius_miles, spot_type, max_price, is_premium, limit)
+            parking_cache_writer.submit(cache_key, cache_data)
         
-        return APIResponse(
+        return APIJSONResponse(PaginatedAPIResponse(
             success=True,
-            data=all_spots[:20],  # Limit to 20 results
-            message=f"Found {len(all_spots)} parking spots"
-        )
+            data=[spot.model_dump(include=include) for spot in spots] if include else spots,
+            message=f"Found {total} parking spots",
+            total=total,
+            next_cursor=encode_search_cursor(next_key) if next_key else None
+        ), headers=cache_headers)
         
     except HTTPException:
         raise
@@ -1069,7 +2924,10 @@ async def get_parking_spot_details(
 
 # Parking History endpoints
 @api_router.get("/parking/history", response_model=APIResponse)
-async def get_parking_history(current_user: User = Depends(get_current_user)):
+async def get_parking_history(
+    fields: Optional[str] = Query(None, description="Comma-separated history fields to return, e.g. spot_name,start_time,total_cost"),
+    current_user: User = Depends(get_current_user)
+):
     """Get parking history for premium users"""
     if current_user.role != UserRole.PREMIUM:
         raise HTTPException(
@@ -1077,8 +2935,13 @@ async def get_parking_history(current_user: User = Depends(get_current_user)):
             detail="Parking history feature requires Premium subscription"
         )
     
-    # Get user's parking history
-    history_cursor = db.parking_history.find({"user_id": current_user.id})
+    try:
+        include = parse_fields(fields, ParkingHistoryItem)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    # Get user's parking history, projected in the query so unrequested fields never leave the database
+    history_cursor = db.parking_history.find({"user_id": current_user.id}, mongo_projection(include) if include else None)
     history = await history_cursor.to_list(length=None)
     
     # If no history exists, create some mock data
@@ -1111,12 +2974,128 @@ async def get_parking_history(current_user: User = Depends(get_current_user)):
             await db.parking_history.insert_one(history_item.dict())
         
         history = mock_history
+        if include:
+            history = [ParkingHistoryItem(**item).model_dump(include=include) for item in history]
     
-    return APIResponse(
+    return APIJSONResponse(APIResponse(
         success=True,
-        data=[ParkingHistoryItem(**item) for item in history],
+        data=history if include else [ParkingHistoryItem(**item) for item in history],
         message="Parking history retrieved"
-    )
+    ))
+
+# Booking availability
+class SpotFullError(Exception):
+    """Raised when a spot has no space left for part of the requested time"""
+
+class BookingAvailability:
+    """Per-spot occupancy counters in fixed time slots, reserved atomically in MongoDB
+    
+    Each slot document counts the bookings covering that slot. A booking reserves every
+    slot it touches with conditional increments that only apply while the slot is below
+    capacity, so concurrent requests on any number of workers can never overbook. The
+    (spot_id, slot_start) index makes availability a range seek, independent of how many
+    bookings a spot has.
+    """
+    
+    def __init__(self, collection_name: str, slot_minutes: int):
+        self.collection_name = collection_name
+        self.slot = timedelta(minutes=slot_minutes)
+    
+    @staticmethod
+    def _as_utc(moment: datetime) -> datetime:
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+        return moment
+    
+    def slot_starts(self, start: datetime, end: datetime) -> List[datetime]:
+        """Starts of every slot overlapping [start, end)"""
+        start, end = self._as_utc(start), self._as_utc(end)
+        slot_seconds = self.slot.total_seconds()
+        first = datetime.utcfromtimestamp(
+            math.floor(start.replace(tzinfo=timezone.utc).timestamp() / slot_seconds) * slot_seconds
+        )
+        slots = []
+        while first < end:
+            slots.append(first)
+            first += self.slot
+        return slots
+    
+    @staticmethod
+    def slot_id(spot_id: str, slot_start: datetime) -> str:
+        return f"{spot_id}|{slot_start:%Y%m%dT%H%M}"
+    
+    async def spaces_available(self, spot_id: str, start: datetime, end: datetime, capacity: int) -> int:
+        """Spaces free for the whole of [start, end)"""
+        slots = self.slot_starts(start, end)
+        busiest = await db[self.collection_name].find(
+            {"spot_id": spot_id, "slot_start": {"$gte": slots[0], "$lte": slots[-1]}},
+            {"booked": 1}
+        ).sort("booked", -1).limit(1).to_list(length=1)
+        return max(0, capacity - (busiest[0]["booked"] if busiest else 0))
+    
+    async def reserve(self, spot_id: str, start: datetime, end: datetime, capacity: int):
+        """Take one space in every slot of [start, end), or raise SpotFullError and take none"""
+        slots = self.slot_starts(start, end)
+        collection = db[self.collection_name]
+        
+        # Make sure every slot document exists, so the increments below never create one
+        try:
+            await collection.bulk_write([
+                UpdateOne(
+                    {"_id": self.slot_id(spot_id, slot_start)},
+                    {"$setOnInsert": {"spot_id": spot_id, "slot_start": slot_start, "booked": 0}},
+                    upsert=True
+                )
+                for slot_start in slots
+            ], ordered=False)
+        except BulkWriteError as e:
+            # Another request created the same slots first
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details["writeErrors"]):
+                raise
+        
+        # A full slot fails its filter, and the upsert then collides with the existing
+        # document; that duplicate key error stops the ordered bulk at the first full slot
+        try:
+            await collection.bulk_write([
+                UpdateOne(
+                    {"_id": self.slot_id(spot_id, slot_start), "booked": {"$lt": capacity}},
+                    {"$inc": {"booked": 1}},
+                    upsert=True
+                )
+                for slot_start in slots
+            ], ordered=True)
+        except BulkWriteError as e:
+            errors = e.details["writeErrors"]
+            if not errors or errors[0]["code"] != DUPLICATE_KEY_ERROR:
+                raise
+            reserved = slots[:errors[0]["index"]]
+            if reserved:
+                await self._decrement(spot_id, reserved)
+            raise SpotFullError(f"full from {slots[errors[0]['index']]:%Y-%m-%d %H:%M} UTC")
+    
+    async def release(self, spot_id: str, start: datetime, end: datetime):
+        """Give back the space a booking of [start, end) reserved"""
+        await self._decrement(spot_id, self.slot_starts(start, end))
+    
+    async def _decrement(self, spot_id: str, slots: List[datetime]):
+        await db[self.collection_name].bulk_write([
+            UpdateOne({"_id": self.slot_id(spot_id, slot_start)}, {"$inc": {"booked": -1}})
+            for slot_start in slots
+        ], ordered=False)
+
+booking_availability = BookingAvailability("booking_slots", BOOKING_SLOT_MINUTES)
+
+async def get_spot_capacity(spot_id: str) -> int:
+    spot = await db.parking_spots.find_one({"_id": spot_id}, {"capacity": 1})
+    if spot is None:
+        raise HTTPException(status_code=404, detail="Parking spot not found")
+    return max(1, int(spot.get("capacity") or 1))
+
+def validate_booking_window(start: datetime, end: datetime):
+    if end <= start:
+        raise HTTPException(status_code=422, detail="End time must be after start time")
+    if end - start > timedelta(hours=BOOKING_MAX_HOURS):
+        raise HTTPException(status_code=422, detail=f"Bookings can be at most {BOOKING_MAX_HOURS} hours long")
 
 # Booking endpoints
 @api_router.post("/bookings", response_model=APIResponse)
@@ -1131,6 +3110,17 @@ async def create_booking(
             detail="Booking feature requires Premium subscription"
         )
     
+    validate_booking_window(booking_request.start_time, booking_request.end_time)
+    capacity = await get_spot_capacity(booking_request.spot_id)
+    
+    # Hold a space for the whole stay before anything is written
+    try:
+        await booking_availability.reserve(
+            booking_request.spot_id, booking_request.start_time, booking_request.end_time, capacity
+        )
+    except SpotFullError as e:
+        raise HTTPException(status_code=409, detail=f"No spaces available for the requested time ({e})")
+    
     # Calculate duration and cost
     duration_hours = (booking_request.end_time - booking_request.start_time).total_seconds() / 3600
     hourly_rate = 5.00  # Mock rate
@@ -1146,7 +3136,11 @@ async def create_booking(
         booking_reference=f"PO{str(uuid.uuid4())[:8].upper()}"
     )
     
-    await db.bookings.insert_one(booking.dict())
+    try:
+        await db.bookings.insert_one(booking.dict())
+    except Exception:
+        await booking_availability.release(booking_request.spot_id, booking_request.start_time, booking_request.end_time)
+        raise
     
     # Add to parking history
     history_item = ParkingHistoryItem(
@@ -1180,9 +3174,26 @@ async def get_user_bookings(current_user: User = Depends(get_current_user)):
         message="Bookings retrieved"
     )
 
+@api_router.get("/parking/spots/{spot_id}/availability", response_model=APIResponse)
+async def get_spot_availability(
+    spot_id: str = Path(...),
+    start_time: datetime = Query(...),
+    end_time: datetime = Query(...)
+):
+    """Spaces free at a parking spot for the whole of a time window"""
+    validate_booking_window(start_time, end_time)
+    capacity = await get_spot_capacity(spot_id)
+    spaces = await booking_availability.spaces_available(spot_id, start_time, end_time, capacity)
+    
+    return APIResponse(
+        success=True,
+        data={"spot_id": spot_id, "capacity": capacity, "spaces_available": spaces, "available": spaces > 0},
+        message=f"{spaces} of {capacity} spaces available"
+    )
+
 # Premium subscription endpoints
 @api_router.get("/subscription/plans", response_model=APIResponse)
-async def get_subscription_plans():
+async def get_subscription_plans(request: Request):
     """Get available subscription plans"""
     plans = [
         SubscriptionPlan(
@@ -1216,11 +3227,18 @@ async def get_subscription_plans():
         )
     ]
     
-    return APIResponse(
+    cache_headers = {
+        "ETag": make_etag(plans),
+        "Cache-Control": f"public, max-age={CATALOG_MAX_AGE_SECONDS}"
+    }
+    if etag_matches(request, cache_headers["ETag"]):
+        return not_modified(cache_headers)
+    
+    return APIJSONResponse(APIResponse(
         success=True,
         data=plans,
         message="Subscription plans retrieved"
-    )
+    ), headers=cache_headers)
 
 @api_router.post("/subscription/upgrade", response_model=APIResponse)
 async def upgrade_to_premium(
@@ -1232,23 +3250,26 @@ async def upgrade_to_premium(
     duration_days = 30 if "Monthly" in plan_name else 365
     expires_at = datetime.utcnow() + timedelta(days=duration_days)
     
-    await db.users.update_one(
+    user_doc = await db.users.find_one_and_update(
         {"email": current_user.email},
         {"$set": {
             "role": UserRole.PREMIUM,
             "subscription_expires": expires_at
-        }}
+        }, "$inc": {"token_version": 1}},
+        return_document=ReturnDocument.AFTER
     )
+    user_cache.invalidate(current_user.email)
     
+    # The new token makes every worker drop its cached free-tier copy of this user
     return APIResponse(
         success=True,
-        data={"subscription_expires": expires_at},
+        data={"subscription_expires": expires_at, "access_token": user_access_token(user_doc), "token_type": "bearer"},
         message="Successfully upgraded to Premium"
     )
 
 # Analytics and admin endpoints
 @api_router.get("/analytics/popular-spots", response_model=APIResponse)
-async def get_popular_spots():
+async def get_popular_spots(request: Request):
     """Get popular parking spots (for ads/sponsored content)"""
     popular_spots = [
         {"name": "Westminster Station", "bookings": 150, "revenue": 750.00},
@@ -1256,11 +3277,18 @@ async def get_popular_spots():
         {"name": "Covent Garden Hotel", "bookings": 90, "revenue": 765.00}
     ]
     
-    return APIResponse(
+    cache_headers = {
+        "ETag": make_etag(popular_spots),
+        "Cache-Control": f"public, max-age={CATALOG_MAX_AGE_SECONDS}"
+    }
+    if etag_matches(request, cache_headers["ETag"]):
+        return not_modified(cache_headers)
+    
+    return APIJSONResponse(APIResponse(
         success=True,
         data=popular_spots,
         message="Popular spots retrieved"
-    )
+    ), headers=cache_headers)
 
 # Health check
 @api_router.get("/health", response_model=APIResponse)
@@ -1268,7 +3296,18 @@ async def health_check():
     """Health check endpoint"""
     return APIResponse(
         success=True,
-        data={"status": "healthy", "timestamp": datetime.utcnow()},
+        data={
+            "status": "healthy",
+            "timestamp": datetime.utcnow(),
+            "upstream_calls": upstream_calls.stats(),
+            "circuit_breakers": circuit_breakers.snapshot(),
+            "geocode_cache": geocode_cache.stats(),
+            "parking_cache_writer": parking_cache_writer.stats(),
+            "search_cache": search_cache.stats(),
+            "user_cache": user_cache.stats(),
+            "password_hasher": password_hasher.stats(),
+            "mail_queue": mail_queue.stats()
+        },
         message="Park On API is healthy"
     )
 
@@ -1282,22 +3321,67 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cross-origin scripts can only read response headers that are exposed explicitly
+    expose_headers=["X-Total-Count", "ETag"],
 )
 
+# Compress responses for cellular clients
+app.add_middleware(CompressionMiddleware)
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
     """Initialize database collections"""
     logger.info("Park On API starting up...")
     
+    # Open pooled connections for upstream APIs
+    for base_url in (TFL_BASE_URL, NOMINATIM_BASE_URL):
+        http_clients.get(base_url)
+    
     # Create indexes for better performance
     await db.users.create_index("email", unique=True)
     await db.bookings.create_index("user_id")
-    await db.parking_cache.create_index("cached_at")
+    await db.booking_slots.create_index([("spot_id", 1), ("slot_start", 1)])
+    await db.booking_slots.create_index("slot_start", expireAfterSeconds=BOOKING_SLOT_RETENTION_SECONDS)
+    try:
+        await db.parking_cache.create_index("cached_at", expireAfterSeconds=PARKING_CACHE_TTL_SECONDS)
+    except OperationFailure:
+        # Older deployments have a plain index on cached_at; replace it with the TTL index
+        await db.parking_cache.drop_index("cached_at_1")
+        await db.parking_cache.create_index("cached_at", expireAfterSeconds=PARKING_CACHE_TTL_SECONDS)
     await db.parking_history.create_index("user_id")
+    await db.parking_spots.create_index([("location", "2dsphere"), ("spot_type", 1), ("hourly_rate", 1)])
+    await db.parking_spots.create_index([("provider", 1), ("ingested_at", 1)])
+    await db.geocode_cache.create_index("expires_at", expireAfterSeconds=0)
+    await db.outbound_mail.create_index([("status", 1), ("next_attempt_at", 1)])
+    await db.outbound_mail.create_index("sent_at", expireAfterSeconds=MAIL_SENT_TTL_SECONDS)
+    
+    # Postcodes resolve locally when a gazetteer file is available
+    if os.path.exists(POSTCODE_CSV_PATH):
+        try:
+            await asyncio.to_thread(postcode_gazetteer.load_csv, POSTCODE_CSV_PATH)
+        except Exception as e:
+            logger.error(f"Failed to load postcode gazetteer: {e}")
+    else:
+        logger.info(f"No postcode gazetteer at {POSTCODE_CSV_PATH}, geocoding postcodes via Nominatim")
+    
+    # Load provider inventory before serving searches
+    try:
+        await ensure_inventory()
+    except Exception as e:
+        logger.error(f"Initial inventory ingest failed: {e}")
+    start_inventory_refresh_loops()
+    parking_cache_writer.start()
+    if MAIL_DELIVERY_CONFIGURED:
+        mail_queue.start()
     
     logger.info("Park On API ready!")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await stop_inventory_refresh_loops()
+    await parking_cache_writer.stop()
+    await mail_queue.stop()
+    await http_clients.close()
+    password_hasher.shutdown()
     client.close()
\ No newline at end of file
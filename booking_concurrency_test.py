@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Concurrency test: hammer one parking spot with simultaneous bookings
+
+Many premium users try to book the same spot for overlapping windows at the
+same moment. The number of confirmed bookings must never exceed the spot's
+capacity, and the availability endpoint must agree with what was booked.
+"""
+import random
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+
+USERS = 5
+ATTEMPTS = 100
+SEARCH_PARAMS = {"latitude": 51.5074, "longitude": -0.1278, "radius_miles": 10.0, "limit": 100}
+
+
+def premium_user(api_url):
+    """Register a user, upgrade them to premium and return auth headers"""
+    credentials = {"email": f"booktest_{uuid.uuid4().hex[:8]}@example.com", "password": "BookTest123!"}
+    response = requests.post(f"{api_url}/auth/register", json=credentials, timeout=30)
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+    response = requests.post(
+        f"{api_url}/subscription/upgrade",
+        params={"plan_name": "Premium Monthly"},
+        headers=headers,
+        timeout=30
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+
+def run_concurrency_test(base_url="https://london-parking-1.preview.emergentagent.com"):
+    api_url = f"{base_url}/api"
+
+    spots = requests.get(f"{api_url}/parking/search", params=SEARCH_PARAMS, timeout=30).json()["data"]
+    if not spots:
+        print("❌ No parking spots found to book")
+        return False
+    # The smallest spot fills up fastest
+    spot = min(spots, key=lambda s: s["capacity"])
+    capacity = spot["capacity"]
+    print(f"🔍 Hammering {spot['name']} ({spot['id']}), capacity {capacity}, with {ATTEMPTS} concurrent bookings")
+
+    users = [premium_user(api_url) for _ in range(USERS)]
+
+    # Every window covers the same middle hour, so all bookings compete for it; a random
+    # future day keeps reruns from colliding with earlier bookings
+    start = (datetime.utcnow() + timedelta(days=random.randint(30, 365))).replace(minute=0, second=0, microsecond=0)
+    offsets = [0, 10, 25, 45]
+
+    def book(attempt):
+        window_start = start + timedelta(minutes=offsets[attempt % len(offsets)])
+        response = requests.post(
+            f"{api_url}/bookings",
+            headers=users[attempt % USERS],
+            json={
+                "spot_id": spot["id"],
+                "start_time": window_start.isoformat(),
+                "end_time": (window_start + timedelta(hours=2)).isoformat(),
+                "vehicle_registration": f"LT{attempt:02d}ABC"
+            },
+            timeout=60
+        )
+        return response.status_code
+
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        statuses = list(pool.map(book, range(ATTEMPTS)))
+
+    confirmed = statuses.count(200)
+    rejected = statuses.count(409)
+    other = len(statuses) - confirmed - rejected
+    print(f"   confirmed: {confirmed}  full (409): {rejected}  other: {other}")
+
+    response = requests.get(
+        f"{api_url}/parking/spots/{spot['id']}/availability",
+        params={
+            "start_time": (start + timedelta(hours=1)).isoformat(),
+            "end_time": (start + timedelta(hours=2)).isoformat()
+        },
+        timeout=30
+    )
+    spaces = response.json()["data"]["spaces_available"]
+    print(f"   spaces left in the contested hour: {spaces}")
+
+    passed = confirmed <= capacity and other == 0 and spaces == capacity - confirmed
+    if passed:
+        print("✅ Passed - capacity was never exceeded")
+    else:
+        print(f"❌ Failed - {confirmed} bookings for capacity {capacity}, {spaces} spaces reported")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_concurrency_test(*sys.argv[1:2]) else 1)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark response compression for the parking search endpoint
+
+Reports bytes on the wire for each Accept-Encoding the API supports, and the
+server CPU each encoding costs per request. CPU is measured by running the
+fetched bodies through backend/server.py's StreamCompressor the way
+CompressionMiddleware does: the JSON response as one body, and the NDJSON
+stream one line at a time with a sync flush after each.
+"""
+import os
+import sys
+import time
+import zlib
+from pathlib import Path
+
+import requests
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")  # server.py needs it to import
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+import server  # noqa: E402
+from server import brotli  # noqa: E402
+
+CPU_ROUNDS = 200
+
+SEARCHES = {
+    "Canary Wharf 1.2mi": {"latitude": 51.5047998, "longitude": -0.0236412, "radius_miles": 1.2},
+    "Central London 10mi": {"latitude": 51.5074, "longitude": -0.1278, "radius_miles": 10.0, "limit": 100},
+}
+
+
+def fetch(api_url, params, encoding):
+    """GET a search and return (bytes on the wire, Content-Encoding, decoded body)"""
+    response = requests.get(
+        f"{api_url}/parking/search",
+        params=params,
+        headers={"Accept-Encoding": encoding},
+        stream=True,
+        timeout=30
+    )
+    response.raise_for_status()
+    wire = response.raw.read(decode_content=False)
+    content_encoding = response.headers.get("Content-Encoding", "identity")
+    if content_encoding == "gzip":
+        body = zlib.decompress(wire, 16 + zlib.MAX_WBITS)
+    elif content_encoding == "br":
+        body = brotli.decompress(wire)
+    else:
+        body = wire
+    return len(wire), content_encoding, body
+
+
+def response_chunks(body, streamed):
+    """The body messages the server sends: one for JSON, one per line and an empty final one for NDJSON"""
+    if not streamed:
+        return [body]
+    return body.splitlines(keepends=True) + [b""]
+
+
+def cpu_per_request(encoding, chunks):
+    """Process CPU time in milliseconds to compress one response with the server's compressor"""
+    if encoding == "identity":
+        return 0.0
+    start = time.process_time()
+    for _ in range(CPU_ROUNDS):
+        compressor = server.StreamCompressor(encoding)
+        for i, chunk in enumerate(chunks):
+            compressor.compress(chunk, i == len(chunks) - 1)
+    return (time.process_time() - start) / CPU_ROUNDS * 1000
+
+
+def run_benchmark(base_url="https://london-parking-1.preview.emergentagent.com"):
+    api_url = f"{base_url}/api"
+    encodings = ["identity", "gzip"] + (["br"] if brotli else [])
+    print(f"📊 gzip level {server.GZIP_LEVEL}, brotli quality {server.BROTLI_QUALITY}")
+
+    for name, params in SEARCHES.items():
+        for streamed in (False, True):
+            print(f"\n🔍 {name}, {'NDJSON stream' if streamed else 'JSON'}")
+            for encoding in encodings:
+                try:
+                    wire_bytes, content_encoding, body = fetch(
+                        api_url, {**params, "stream": "true"} if streamed else params, encoding
+                    )
+                except Exception as e:
+                    print(f"❌ {encoding}: {e}")
+                    continue
+
+                cpu_ms = cpu_per_request(content_encoding, response_chunks(body, streamed))
+                ratio = len(body) / wire_bytes if wire_bytes else 0
+                print(
+                    f"   {encoding:<8} -> {content_encoding:<8} "
+                    f"{wire_bytes:>8} bytes on the wire ({ratio:.1f}x), "
+                    f"{cpu_ms:.3f} ms CPU per request"
+                )
+
+
+if __name__ == "__main__":
+    run_benchmark(*sys.argv[1:2])
@@ -15,8 +15,40 @@ self.addEventListener('install', (event) => {
   );
 });
 
+// API responses worth keeping for offline use; the backend sends ETags and Cache-Control for these
+const API_CACHE_PREFIX = 'park-on-api-';
+const API_CACHE_NAME = `${API_CACHE_PREFIX}v2`;
+const CACHEABLE_API_PATHS = [
+  '/api/parking/search',
+  '/api/subscription/plans',
+  '/api/analytics/popular-spots'
+];
+const MAX_API_CACHE_ENTRIES = 50;
+const MAX_API_CACHE_AGE_MS = 24 * 60 * 60 * 1000;
+
+// Activate event: drop API caches left behind by earlier versions
+self.addEventListener('activate', (event) => {
+  event.waitUntil(
+    caches.keys().then((names) => Promise.all(
+      names
+        .filter((name) => name.startsWith(API_CACHE_PREFIX) && name !== API_CACHE_NAME)
+        .map((name) => caches.delete(name))
+    ))
+  );
+});
+
 // Fetch event
 self.addEventListener('fetch', (event) => {
+  const url = new URL(event.request.url);
+  if (
+    event.request.method === 'GET' &&
+    CACHEABLE_API_PATHS.includes(url.pathname) &&
+    url.searchParams.get('stream') !== 'true'
+  ) {
+    event.respondWith(networkFirst(event.request));
+    return;
+  }
+
   event.respondWith(
     caches.match(event.request)
       .then((response) => {
@@ -25,6 +57,58 @@ self.addEventListener('fetch', (event) => {
   );
 });
 
+async function networkFirst(request) {
+  const cache = await caches.open(API_CACHE_NAME);
+  try {
+    // The browser revalidates with If-None-Match, so unchanged responses cost a 304
+    const response = await fetch(request);
+    if (isShareable(response)) {
+      await cache.delete(request);
+      await cache.put(request, await stampCachedAt(response.clone()));
+      await trimCache(cache);
+    }
+    return response;
+  } catch (error) {
+    const cached = await cache.match(request);
+    if (cached && !isExpired(cached)) {
+      return cached;
+    }
+    throw error;
+  }
+}
+
+// Premium results are private to the user and must not outlive their session here
+function isShareable(response) {
+  const cacheControl = response.headers.get('Cache-Control') || '';
+  return response.ok && !/private|no-store/.test(cacheControl);
+}
+
+// The API is cross-origin and its Date header is not exposed, so the worker records when it stored each copy
+const CACHED_AT_HEADER = 'sw-cached-at';
+
+async function stampCachedAt(response) {
+  const headers = new Headers(response.headers);
+  headers.set(CACHED_AT_HEADER, String(Date.now()));
+  return new Response(await response.blob(), {
+    status: response.status,
+    statusText: response.statusText,
+    headers
+  });
+}
+
+function isExpired(response) {
+  const cachedAt = Number(response.headers.get(CACHED_AT_HEADER));
+  return !cachedAt || Date.now() - cachedAt > MAX_API_CACHE_AGE_MS;
+}
+
+// Cache keys come back in insertion order, and refreshed entries are re-inserted, so the oldest go first
+async function trimCache(cache) {
+  const keys = await cache.keys();
+  await Promise.all(
+    keys.slice(0, Math.max(0, keys.length - MAX_API_CACHE_ENTRIES)).map((key) => cache.delete(key))
+  );
+}
+
 // Background sync for offline functionality
 self.addEventListener('sync', (event) => {
   if (event.tag === 'parking-search') {
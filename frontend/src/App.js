@@ -731,6 +731,7 @@ const UpgradeModal = ({ isOpen, onClose }) => {
       );
       
       if (response.data.success) {
+        localStorage.setItem('token', response.data.data.access_token);
         alert('Successfully upgraded to Premium!');
         window.location.reload();
       }
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Load test: parking search latency while a burst of logins is running
+
+Measures search p50/p99 on its own, then again while several threads log in
+back to back. With password hashing off the event loop the two should match;
+when bcrypt runs on the loop every search waits behind the logins.
+"""
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+SEARCH_PARAMS = {"latitude": 51.5074, "longitude": -0.1278, "radius_miles": 1.2}
+SEARCH_THREADS = 4
+LOGIN_THREADS = 8
+PHASE_SECONDS = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_searches(api_url, seconds):
+    """Search from SEARCH_THREADS threads for the given time
+    
+    Returns latencies in ms of successful searches, and failure counts keyed by status code
+    or exception name. A timed-out search counts as a failure, not as a 30s latency.
+    """
+    latencies = []
+    failures = {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker():
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                response = session.get(f"{api_url}/parking/search", params=SEARCH_PARAMS, timeout=30)
+                failure = None if response.status_code == 200 else response.status_code
+            except requests.RequestException as e:
+                failure = type(e).__name__
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                if failure is None:
+                    latencies.append(elapsed)
+                else:
+                    failures[failure] = failures.get(failure, 0) + 1
+
+    with ThreadPoolExecutor(SEARCH_THREADS) as pool:
+        for future in [pool.submit(worker) for _ in range(SEARCH_THREADS)]:
+            future.result()
+    return latencies, failures
+
+
+def run_logins(api_url, credentials, stop):
+    """Log in from LOGIN_THREADS threads until stop is set; returns status code counts"""
+    statuses = {}
+    lock = threading.Lock()
+
+    def worker():
+        session = requests.Session()
+        while not stop.is_set():
+            try:
+                status = session.post(f"{api_url}/auth/login", json=credentials, timeout=30).status_code
+            except requests.RequestException as e:
+                status = type(e).__name__
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+
+    threads = [threading.Thread(target=worker) for _ in range(LOGIN_THREADS)]
+    for thread in threads:
+        thread.start()
+    return threads, statuses
+
+
+def report(name, latencies, failures):
+    failed = sum(failures.values())
+    if not latencies:
+        print(f"❌ {name}: no successful searches, {failed} failed {failures}")
+        return
+    print(
+        f"   {name:<22} {len(latencies):>6} searches  "
+        f"p50 {percentile(latencies, 0.50):7.1f} ms  "
+        f"p99 {percentile(latencies, 0.99):7.1f} ms  "
+        f"max {max(latencies):7.1f} ms  "
+        f"failed {failed}" + (f" {failures}" if failed else "")
+    )
+
+
+def run_load_test(base_url="https://london-parking-1.preview.emergentagent.com"):
+    api_url = f"{base_url}/api"
+    credentials = {"email": f"loadtest_{uuid.uuid4().hex[:8]}@example.com", "password": "LoadTest123!"}
+
+    print("🔍 Registering load test user...")
+    response = requests.post(
+        f"{api_url}/auth/register",
+        json={**credentials, "full_name": "Load Test"},
+        timeout=30
+    )
+    if response.status_code != 200:
+        print(f"❌ Registration failed: {response.status_code} {response.text}")
+        return
+
+    print(f"🔍 Searching for {PHASE_SECONDS}s without logins...")
+    baseline, baseline_failures = run_searches(api_url, PHASE_SECONDS)
+
+    print(f"🔍 Searching for {PHASE_SECONDS}s while {LOGIN_THREADS} threads log in...")
+    stop = threading.Event()
+    threads, statuses = run_logins(api_url, credentials, stop)
+    try:
+        under_load, under_load_failures = run_searches(api_url, PHASE_SECONDS)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    print("\n📊 Search latency")
+    report("no logins", baseline, baseline_failures)
+    report("during logins", under_load, under_load_failures)
+    print(f"   login responses: {dict(sorted(statuses.items(), key=str))}")
+
+    health = requests.get(f"{api_url}/health", timeout=30).json()
+    hasher = health.get("data", {}).get("password_hasher")
+    if hasher:
+        print(f"   password hasher: {hasher}")
+
+
+if __name__ == "__main__":
+    run_load_test(*sys.argv[1:2])
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Mail queue test: deliver verification emails through a local SMTP stand-in
+
+Starts an aiosmtpd server, registers several users and checks that every
+verification email arrives, all over one SMTP connection. Then stops the SMTP
+server, registers one more user and checks that the message is retried with
+growing delays, and that it is delivered once the server is back.
+
+By default the backend is started here, pointed at aiosmtpd with
+SMTP_AUTH=false SMTP_STARTTLS=false and short retry intervals; it needs
+MONGO_URL and uses its own database (MAIL_TEST_DB_NAME), dropped afterwards.
+To test a backend that is already running with that configuration, pass its
+base URL instead.
+
+    MONGO_URL=mongodb://localhost:27017 python mail_queue_test.py [base_url]
+"""
+import os
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import requests
+from aiosmtpd.controller import Controller
+
+SMTP_PORT = int(os.environ.get("MAIL_TEST_SMTP_PORT", "8025"))
+BACKEND_PORT = int(os.environ.get("MAIL_TEST_BACKEND_PORT", "8010"))
+DB_NAME = os.environ.get("MAIL_TEST_DB_NAME", "park_on_mail_queue_test")
+USERS = 5
+RETRIES = 3  # Failed attempts to watch after the first, while the SMTP server is down
+BACKEND_ENV = {
+    "SMTP_SERVER": "127.0.0.1",
+    "SMTP_PORT": str(SMTP_PORT),
+    "SMTP_AUTH": "false",
+    "SMTP_STARTTLS": "false",
+    "MAIL_POLL_SECONDS": "0.2",
+    "MAIL_RETRY_BASE_SECONDS": "1",
+    "DB_NAME": DB_NAME,
+}
+
+
+class RecordingHandler:
+    """Remembers each delivered recipient and the client address of the connection it came over"""
+
+    def __init__(self):
+        self.deliveries = []
+
+    async def handle_DATA(self, server, session, envelope):
+        for recipient in envelope.rcpt_tos:
+            self.deliveries.append((recipient, session.peer))
+        return "250 OK"
+
+
+def start_smtp(handler):
+    controller = Controller(handler, hostname="127.0.0.1", port=SMTP_PORT)
+    controller.start()
+    return controller
+
+
+def start_backend():
+    """Run the API with uvicorn against the local SMTP server; returns the process and base URL"""
+    base_url = f"http://127.0.0.1:{BACKEND_PORT}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(BACKEND_PORT), "--log-level", "warning"],
+        cwd=Path(__file__).parent / "backend",
+        env={**os.environ, **BACKEND_ENV}
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/api/health", timeout=5).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("Backend did not start")
+
+
+def mail_stats(api_url):
+    return requests.get(f"{api_url}/health", timeout=30).json()["data"]["mail_queue"]
+
+
+def register(api_url):
+    email = f"mailtest_{uuid.uuid4().hex[:8]}@example.com"
+    response = requests.post(
+        f"{api_url}/auth/register",
+        json={"email": email, "password": "MailTest123!", "full_name": "Mail Test"},
+        timeout=30
+    )
+    response.raise_for_status()
+    return email
+
+
+def wait_for(condition, seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def run_mail_queue_test(api_url):
+    handler = RecordingHandler()
+    smtp = start_smtp(handler)
+    passed = True
+    try:
+        print(f"🔍 Registering {USERS} users...")
+        started = time.perf_counter()
+        emails = [register(api_url) for _ in range(USERS)]
+        print(f"   {USERS} registrations in {time.perf_counter() - started:.2f}s")
+
+        delivered = wait_for(lambda: {recipient for recipient, _ in handler.deliveries} >= set(emails), 30)
+        connections = {peer for recipient, peer in handler.deliveries if recipient in emails}
+        print(f"   delivered: {len(handler.deliveries)}/{USERS} over {len(connections)} connection(s)")
+        if not delivered or len(connections) != 1:
+            print("❌ Expected every email over a single SMTP connection")
+            passed = False
+
+        print("🔍 Stopping the SMTP server and registering one more user...")
+        smtp.stop()
+        smtp = None
+        retried_at = []
+        retried = mail_stats(api_url)["retried"]
+        late_email = register(api_url)
+
+        def next_retry():
+            nonlocal retried
+            current = mail_stats(api_url)["retried"]
+            if current > retried:
+                retried_at.extend([time.monotonic()] * (current - retried))
+                retried = current
+            return len(retried_at) > RETRIES
+
+        if not wait_for(next_retry, 60):
+            print(f"❌ Only {len(retried_at)} failed attempts while the SMTP server was down")
+            passed = False
+        gaps = [later - earlier for earlier, later in zip(retried_at, retried_at[1:])]
+        print(f"   seconds between attempts: {[round(gap, 1) for gap in gaps]}")
+        if len(gaps) < RETRIES or gaps[-1] < 1.5 * gaps[0]:
+            print("❌ Retries did not back off")
+            passed = False
+
+        print("🔍 Restarting the SMTP server...")
+        smtp = start_smtp(handler)
+        if wait_for(lambda: any(recipient == late_email for recipient, _ in handler.deliveries), 60):
+            print("   queued email delivered after the restart")
+        else:
+            print("❌ Queued email was not delivered after the restart")
+            passed = False
+        print(f"   mail queue: {mail_stats(api_url)}")
+    finally:
+        if smtp is not None:
+            smtp.stop()
+
+    print("✅ Passed" if passed else "❌ Failed")
+    return passed
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(0 if run_mail_queue_test(f"{sys.argv[1]}/api") else 1)
+
+    backend, base_url = start_backend()
+    try:
+        result = run_mail_queue_test(f"{base_url}/api")
+    finally:
+        backend.terminate()
+        backend.wait()
+        from pymongo import MongoClient
+        MongoClient(os.environ["MONGO_URL"]).drop_database(DB_NAME)
+    sys.exit(0 if result else 1)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-spot CPU and memory of parking search
+
+Loads a synthetic inventory of car parks around central London and runs the
+search code from backend/server.py in-process, reporting time, CPU and bytes
+allocated per candidate spot for cold (uncached) and warm searches.
+
+With MONGO_URL set the inventory is ingested into MongoDB and searched through
+$geoNear, as in production; the local inventory index is measured as well.
+The benchmark writes to its own database (BENCHMARK_DB_NAME) and drops it
+afterwards.
+
+    MONGO_URL=mongodb://localhost:27017 python search_benchmark.py [spots]
+"""
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+SPOTS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+SEARCHES = 20
+WARM_SEARCHES = 50
+RADIUS_KM = 16.0
+PAGE_SIZE = 20
+
+USE_MONGO = "MONGO_URL" in os.environ
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ["DB_NAME"] = os.environ.get("BENCHMARK_DB_NAME", "park_on_search_benchmark")
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+logging.disable(logging.WARNING)
+
+import server  # noqa: E402
+
+
+class LocalOnlyCollection:
+    """Stands in for parking_spots so find_parking_spots falls back to the local index"""
+
+    def aggregate(self, *args, **kwargs):
+        raise RuntimeError("benchmarking the local inventory index")
+
+
+class LocalOnlyDatabase:
+    parking_spots = LocalOnlyCollection()
+
+
+def synthetic_records(count):
+    rng = random.Random(1)
+    return [
+        server.normalize_tfl_car_park({
+            "id": i,
+            "name": f"Car Park {i}",
+            "lat": 51.5 + rng.uniform(-0.15, 0.15),
+            "lon": -0.1 + rng.uniform(-0.25, 0.25),
+            "bayCount": 50,
+            "spacesAvailable": 3
+        })
+        for i in range(count)
+    ]
+
+
+def search_points(count):
+    rng = random.Random(2)
+    return [(51.5 + rng.uniform(-0.05, 0.05), -0.1 + rng.uniform(-0.05, 0.05)) for _ in range(count)]
+
+
+async def search(lat, lon):
+    _, total, _ = await server.search_spots_page(lat, lon, RADIUS_KM, None, None, True, PAGE_SIZE)
+    return total
+
+
+async def measure_cold():
+    """Time and CPU per search with the candidate cache emptied before each one"""
+    wall = cpu = 0.0
+    candidates = 0
+    for lat, lon in search_points(SEARCHES):
+        server.search_cache.entries.clear()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        candidates += await search(lat, lon)
+        wall += time.perf_counter() - wall_start
+        cpu += time.process_time() - cpu_start
+    return wall, cpu, candidates
+
+
+async def measure_memory():
+    """Bytes still held (by the cache) and peak bytes allocated for one cold search"""
+    server.search_cache.entries.clear()
+    tracemalloc.start()
+    try:
+        candidates = await search(51.5, -0.1)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return retained, peak, candidates
+
+
+async def measure_warm():
+    await search(51.5, -0.1)
+    start = time.perf_counter()
+    for _ in range(WARM_SEARCHES):
+        await search(51.5, -0.1)
+    return time.perf_counter() - start
+
+
+async def run_path(name):
+    await measure_cold()  # Warm up imports, numpy and the connection pool
+    wall, cpu, candidates = await measure_cold()
+    retained, peak, memory_candidates = await measure_memory()
+    warm = await measure_warm()
+
+    print(f"\n🔍 {name}: {candidates // SEARCHES} candidates per search")
+    print(f"   cold search   {wall / SEARCHES * 1000:8.1f} ms  {wall / candidates * 1e6:6.2f} us/candidate")
+    print(f"   cold CPU      {cpu / SEARCHES * 1000:8.1f} ms  {cpu / candidates * 1e6:6.2f} us/candidate")
+    print(f"   memory        {retained / memory_candidates:8.0f} B/candidate retained, {peak / memory_candidates:.0f} B/candidate peak")
+    print(f"   warm search   {warm / WARM_SEARCHES * 1000:8.1f} ms")
+
+
+async def run_benchmark():
+    records = synthetic_records(SPOTS)
+    print(f"📊 Search benchmark over {SPOTS} synthetic spots, radius {RADIUS_KM} km, page size {PAGE_SIZE}")
+
+    if USE_MONGO:
+        await server.db.parking_spots.drop()
+        await server.db.parking_spots.create_index([("location", "2dsphere"), ("spot_type", 1), ("hourly_rate", 1)])
+
+        async def feed():
+            for record in records:
+                yield record
+
+        try:
+            await server.ingest_provider_records("tfl", feed())
+            await run_path(f"MongoDB $geoNear ({os.environ['DB_NAME']})")
+        finally:
+            await server.client.drop_database(os.environ["DB_NAME"])
+    else:
+        server.parking_inventory.load_provider("tfl", records)
+        server.inventory_content_hashes["tfl"] = server.inventory_content_hash(records)
+        print("   MONGO_URL not set, skipping the MongoDB path")
+
+    server.db = LocalOnlyDatabase()
+    await run_path("Local inventory index")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark())